@@ -1,7 +1,8 @@
+import time
 import customtkinter as ctk
 from password_target import PasswordTarget
 from data_handler import DataHandler
-from password_generator import PasswordGenerator
+from generator_engines import EngineSelector
 from error_toplevel import ErrorToplevel
 from update_requirements import UpdateTargetRequirements
 
@@ -14,9 +15,13 @@ class App:
     ------
     width: int
     height: int
-    password_generator: PasswordGenerator
+    engine_selector: EngineSelector
+    password_generator: PasswordGeneratorProtocol, engine selected for single passwords
     datahandler: DataHandler
     result: ctk.StringVar
+    error_toplevel: ErrorToplevel, built on first use
+    requirements_toplevel: UpdateTargetRequirements, built on first use
+    dialog_open_latency: dict, seconds taken by the last opening of each dialog
 
     methods
     -------
@@ -28,7 +33,7 @@ class App:
     generate_password_btn_callback(): callback for the generate password button
     update_requirements_btn_callback(): callback for the update requirements button
     open_error_message(text): open error toplevel
-    open_toplevel(toplevel): opens a toplevel window
+    open_toplevel(name, show): shows a toplevel window and records its latency
     update_data_file(): updates data about the password target
     run(): runs the application
 
@@ -45,9 +50,13 @@ class App:
         self.window = ctk.CTk()
         self.width = width
         self.height = height
-        self.password_generator = PasswordGenerator()
+        self.engine_selector = EngineSelector()
+        self.password_generator = self.engine_selector.select(1)
         self.datahandler = DataHandler()
         self.result = ctk.StringVar()
+        self.error_toplevel = None
+        self.requirements_toplevel = None
+        self.dialog_open_latency = {}
 
     def set_up_window_parts(self) -> None:
         """
@@ -57,7 +66,6 @@ class App:
         ctk.set_default_color_theme("blue")
         self.window.geometry(f"{self.width}x{self.height}")
         self.window.title("Password Generator")
-        self.window.toplevel_window = None
         self.window.frame_1 = ctk.CTkFrame(master=self.window)
 
         self.set_up_labels()
@@ -157,6 +165,7 @@ class App:
         """
         if not self.window.password_target_entry.get():
             self.open_error_message("no url or file name")
+            return
         self.update_data_file(self.window.password_target_entry.get())
 
     def open_error_message(self, text: str) -> None:
@@ -166,24 +175,27 @@ class App:
         Args:
             text (str): error message to display
         """
-        err = ErrorToplevel(self.window)
-        err.window.label.configure(text=text)
-        self.open_toplevel(err)
+
+        def show() -> None:
+            if not self._exists(self.error_toplevel):
+                self.error_toplevel = ErrorToplevel(self.window)
+            self.error_toplevel.show(text)
+
+        self.open_toplevel("error", show)
         self.result.set("")
 
-    def open_toplevel(self, toplevel_window: ctk.CTkToplevel) -> None:
+    def open_toplevel(self, name: str, show) -> None:
         """
-        Opens a toplevel window
+        Opens a toplevel window and records how long it took in dialog_open_latency.
 
         Args:
-            toplevel_window (ctk.CTkToplevel): toplevel window to open
+            name (str): dialog name used as the dialog_open_latency key
+            show (Callable[[], None]): builds the toplevel if needed and shows it
         """
-        if (
-            self.window.toplevel_window is None
-        ) or not self.window.toplevel_window.window.winfo_exists():
-            self.window.toplevel_window = toplevel_window
-        else:
-            self.window.toplevel_window.window.focus()
+        start = time.perf_counter()
+        show()
+        self.window.update_idletasks()
+        self.dialog_open_latency[name] = time.perf_counter() - start
 
     def update_data_file(self, password_target_name: str) -> None:
         """
@@ -192,9 +204,16 @@ class App:
         Args:
             password_target_name (str): url or file name of the password target
         """
-        if (self.window.toplevel_window is None) or (
-            not self.window.toplevel_window.window.winfo_exists()
+        requirements = self.requirements_toplevel
+        if (
+            self._exists(requirements)
+            and requirements.window.winfo_viewable()
+            and requirements.password_target.name == password_target_name
         ):
+            requirements.window.focus()
+            return
+
+        def show() -> None:
             if self.datahandler.contains(password_target_name):
                 password_target = self.datahandler.read_target_data_from_file(
                     password_target_name
@@ -202,12 +221,22 @@ class App:
             else:
                 password_target = PasswordTarget(password_target_name)
                 self.datahandler.add_password_target(password_target)
-            self.window.toplevel_window = UpdateTargetRequirements(
-                self.window, password_target, self.datahandler
-            )
-            self.window.toplevel_window.window.mainloop()
-        else:
-            self.window.toplevel_window.window.focus()
+            if self._exists(self.requirements_toplevel):
+                self.requirements_toplevel.bind_target(password_target)
+            else:
+                self.requirements_toplevel = UpdateTargetRequirements(
+                    self.window, password_target, self.datahandler
+                )
+            self.requirements_toplevel.show()
+
+        self.open_toplevel("requirements", show)
+
+    @staticmethod
+    def _exists(toplevel) -> bool:
+        """
+        Checks that a lazily built toplevel was built and not destroyed.
+        """
+        return toplevel is not None and bool(toplevel.window.winfo_exists())
 
     def run(self) -> None:
         """
@@ -0,0 +1,252 @@
+import asyncio
+import contextlib
+from concurrent.futures import Executor
+from typing import Iterable, List, Optional
+from password_target import PasswordTarget
+from password_generator import PasswordGenerator
+from data_handler import DataHandler
+
+
+class AsyncPasswordGenerator:
+    """
+    Asyncio counterpart of PasswordGenerator.
+
+    The hashing and character manipulation run in an executor so the event loop
+    is never blocked.
+
+    Attributes
+    ----------
+    password_generator : PasswordGenerator
+    executor : Executor | None (None uses the loop default executor)
+    concurrency : int
+
+    Methods
+    -------
+    generate_password(password_target, hash_key): generate a single password
+    generate_passwords(password_targets, hash_key, concurrency): generate passwords for many targets
+    """
+
+    def __init__(
+        self,
+        password_generator: Optional[PasswordGenerator] = None,
+        executor: Optional[Executor] = None,
+        concurrency: int = 8,
+    ) -> None:
+        """
+        Args:
+            password_generator (PasswordGenerator): wrapped blocking generator
+            executor (Executor): executor used for hashing, None for the loop default
+            concurrency (int): default maximum of in-flight generations
+        """
+        self.password_generator = password_generator or PasswordGenerator()
+        self.executor = executor
+        self.concurrency = concurrency
+
+    async def generate_password(
+        self, password_target: PasswordTarget, hash_key: str
+    ) -> str:
+        """
+        Generates a password without blocking the event loop.
+
+        Args:
+            password_target (PasswordTarget): Password target object.
+            hash_key (str): input hash key
+
+        Returns:
+            str: target generated password
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor,
+            self.password_generator.generate_password,
+            password_target,
+            hash_key,
+        )
+
+    async def generate_passwords(
+        self,
+        password_targets: Iterable[PasswordTarget],
+        hash_key: str,
+        concurrency: Optional[int] = None,
+    ) -> List[str]:
+        """
+        Generates passwords for many targets with asyncio.gather,
+        keeping at most `concurrency` generations in flight.
+
+        Args:
+            password_targets (Iterable[PasswordTarget]): password target objects
+            hash_key (str): input hash key
+            concurrency (int): maximum of in-flight generations, defaults to self.concurrency
+
+        Returns:
+            List[str]: generated passwords, in the order of password_targets
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.concurrency)
+
+        async def limited(password_target: PasswordTarget) -> str:
+            async with semaphore:
+                return await self.generate_password(password_target, hash_key)
+
+        return list(
+            await asyncio.gather(*(limited(target) for target in password_targets))
+        )
+
+
+class _ReadWriteLock:
+    """
+    Asyncio lock letting reads run together while writes run alone.
+
+    Waiting writers block new readers, so a stream of reads cannot starve them.
+    """
+
+    def __init__(self) -> None:
+        self._condition = asyncio.Condition()
+        self._readers = 0
+        self._writing = False
+        self._waiting_writers = 0
+
+    @contextlib.asynccontextmanager
+    async def read(self):
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: not self._writing and not self._waiting_writers
+            )
+            self._readers += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._readers -= 1
+                self._condition.notify_all()
+
+    @contextlib.asynccontextmanager
+    async def write(self):
+        async with self._condition:
+            self._waiting_writers += 1
+            try:
+                await self._condition.wait_for(
+                    lambda: not self._writing and not self._readers
+                )
+            finally:
+                self._waiting_writers -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+
+class AsyncDataHandler:
+    """
+    Asyncio counterpart of DataHandler.
+
+    Every file access runs in an executor. A read/write lock lets reads run
+    concurrently, runs each read-modify-write alone and makes reads wait for
+    in-progress writes. A cancelled call, e.g. by asyncio.wait_for, keeps the
+    lock until its executor call has finished. The lock only coordinates
+    coroutines using the same AsyncDataHandler; other threads and processes
+    are serialized by the file lock of DataHandler.
+
+    DataHandler() reads the data file and may seed its journal, so build it
+    before starting the event loop or with loop.run_in_executor.
+
+    Attributes
+    ----------
+    data_handler : DataHandler
+    executor : Executor | None (None uses the loop default executor)
+
+    Methods
+    -------
+    contains(password_target_name)
+    read_target_data_from_file(password_target_name)
+    read_targets_data_from_file(password_target_names)
+    add_password_target(password_target)
+    update_data_file(password_target)
+    delete_password_target(password_target)
+    """
+
+    def __init__(
+        self,
+        data_handler: DataHandler,
+        executor: Optional[Executor] = None,
+    ) -> None:
+        """
+        Args:
+            data_handler (DataHandler): wrapped blocking data handler, already built
+            executor (Executor): executor used for file I/O, None for the loop default
+        """
+        self.data_handler = data_handler
+        self.executor = executor
+        self._lock = _ReadWriteLock()
+
+    async def _run(self, func, *args):
+        """
+        Run func in the executor. If the caller is cancelled, wait for func to
+        finish before raising CancelledError, so the lock held by the caller
+        is not released while the file is still being accessed.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, func, *args)
+        cancelled = False
+        while not future.done():
+            try:
+                await asyncio.wait([future])
+            except asyncio.CancelledError:
+                cancelled = True
+        if cancelled:
+            raise asyncio.CancelledError()
+        return future.result()
+
+    async def _read(self, func, *args):
+        async with self._lock.read():
+            return await self._run(func, *args)
+
+    async def _write(self, func, *args):
+        async with self._lock.write():
+            return await self._run(func, *args)
+
+    async def contains(self, password_target_name: str) -> bool:
+        """
+        Check if the password target exists in the data file.
+        """
+        return await self._read(self.data_handler.contains, password_target_name)
+
+    async def read_target_data_from_file(
+        self, password_target_name: str
+    ) -> PasswordTarget:
+        """
+        Get the password target from the data file.
+        """
+        return await self._read(
+            self.data_handler.read_target_data_from_file, password_target_name
+        )
+
+    async def read_targets_data_from_file(
+        self, password_target_names: Iterable[str]
+    ) -> List[PasswordTarget]:
+        """
+        Get many password targets from the data file, loading it only once.
+        """
+        return await self._read(
+            self.data_handler.read_targets_data_from_file, list(password_target_names)
+        )
+
+    async def add_password_target(self, password_target: PasswordTarget) -> None:
+        """
+        Add the password target to the data file.
+        """
+        await self._write(self.data_handler.add_password_target, password_target)
+
+    async def update_data_file(self, password_target: PasswordTarget) -> None:
+        """
+        Update the password target requirements in the data file.
+        """
+        await self._write(self.data_handler.update_data_file, password_target)
+
+    async def delete_password_target(self, password_target: PasswordTarget) -> None:
+        """
+        Remove the password target from the data file.
+        """
+        await self._write(self.data_handler.delete_password_target, password_target)
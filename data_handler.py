@@ -1,6 +1,24 @@
+import contextlib
 import json
 import os
+import uuid
+from typing import List, Optional, Union
 from password_target import PasswordTarget
+from serializers import (
+    Serializer,
+    dump_file,
+    load_file,
+    resolve_serializer,
+    write_atomic,
+)
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# journal lines allowed beyond two per target before the journal is compacted
+COMPACT_SLACK = 1000
 
 
 class DataHandler:
@@ -10,6 +28,21 @@ class DataHandler:
     Attributes:
     ----------
     json_file (str): path to the data.json file
+    journal_file (str): path to the change journal kept next to the data.json file
+    lock_file (str): path to the file locking the journal between processes
+    node_id (str): name of this node in the journal
+    serializer (Serializer): encoding used when writing, chosen by name or by
+        json_file extension (see serializers.py). Files are sniffed on load,
+        so a catalogue written by any serializer keeps loading.
+
+    Every mutation appends a line to the journal with a monotonically
+    increasing sequence number, so nodes can exchange only the targets
+    changed since the last sync (changes_since / apply_changes). Conflicts
+    are resolved by keeping the change with the highest (Lamport clock, node)
+    pair, deletions are kept as tombstones until compact() drops them.
+    The journal is JSON lines whatever the serializer. Every mutation holds
+    a file lock from loading data.json to appending to the journal, so
+    concurrent writers on the same files never lose each other's changes.
 
     Methods:
     ------
@@ -17,64 +50,99 @@ class DataHandler:
     update_data_file(password_target: PasswordTarget): update the data.json file
     contains(password_target_name: str): check if the password target exists in the data.json file
     read_target_data_from_file(password_target_name: str): get the password target from the data.json file
+    read_targets_data_from_file(password_target_names: List[str]): get many password targets from the data.json file
+    read_all_targets_from_file(): get every password target from the data.json file
     read_target_data_from_obj(self, password_target: PasswordTarget):
     add_password_target(password_target: PasswordTarget): add the password target to the data.json file
+    delete_password_target(password_target: PasswordTarget): remove the password target from the data.json file
+    last_seq(): sequence number of the latest change
+    changes_since(seq: int): changes recorded after seq
+    apply_changes(changes: List[dict]): merge changes exported by another node
+    compact(tombstone_horizon: int): drop superseded journal lines and old tombstones
 
     """
 
-    def __init__(self) -> None:
-        self.json_file = "data.json"
+    def __init__(
+        self,
+        json_file: str = "data.json",
+        node_id: Optional[str] = None,
+        serializer: Union[None, str, Serializer] = None,
+    ) -> None:
+        self.json_file = json_file
+        self.serializer = resolve_serializer(serializer, json_file)
+        self.journal_file = f"{json_file}.journal"
+        self.lock_file = f"{json_file}.lock"
         self.open_file()
+        self.node_id = node_id
+        self.node_id = self._open_journal(node_id)
 
     def open_file(self) -> None:
         """
         Open the data.json file.
         """
         if os.path.isfile(self.json_file):
-            with open(self.json_file, "r+") as outfile:
-                if (os.stat(self.json_file).st_size) < 2:
-                    json.dump({}, outfile, indent=4)
+            if (os.stat(self.json_file).st_size) < 2:
+                self._dump({})
         else:
-            with open(self.json_file, "w+") as outfile:
-                json.dump({}, outfile, indent=4)
-                print(f"JSON file {self.json_file} created")
+            self._dump({})
+            print(f"JSON file {self.json_file} created")
 
     def update_data_file(self, password_target: PasswordTarget) -> None:
         """
         Update the data.json file.
         """
-        with open(self.json_file, "r+") as json_file:
-            data = json.load(json_file)
+        with self._journal_lock():
+            data = self._load()
             assert password_target.name in data
             data[password_target.name]["min_uppers"] = password_target.min_uppers
             data[password_target.name]["min_lowers"] = password_target.min_lowers
             data[password_target.name]["min_digits"] = password_target.min_digits
             data[password_target.name]["length"] = password_target.length
-            json_file.seek(0)
-            json.dump(data, json_file, indent=4)
-            json_file.truncate()
+            self._dump(data)
+            self._record_changes([password_target.name], data)
 
     def contains(self, password_target_name: str) -> bool:
         """
         Check if the password target exists in the data.json file.
         """
-        if not (os.stat("data.json").st_size):
-            return False
-        with open(self.json_file, "r") as json_file:
-            data = json.load(json_file)
-            return password_target_name in data
+        return password_target_name in self._load()
 
     def read_target_data_from_file(self, password_target_name: str) -> PasswordTarget:
         """
         Get the password target from the data.json file.
         """
+        data = self._load()
+        return self._target_from_data(password_target_name, data[password_target_name])
+
+    def read_targets_data_from_file(
+        self, password_target_names: List[str]
+    ) -> List[PasswordTarget]:
+        """
+        Get many password targets from the data.json file, loading it only once.
+        """
+        data = self._load()
+        return [
+            self._target_from_data(name, data[name]) for name in password_target_names
+        ]
+
+    def read_all_targets_from_file(self) -> List[PasswordTarget]:
+        """
+        Get every password target from the data.json file.
+        """
+        data = self._load()
+        return [self._target_from_data(name, record) for name, record in data.items()]
+
+    def _target_from_data(
+        self, password_target_name: str, data: dict
+    ) -> PasswordTarget:
+        """
+        Build a PasswordTarget from its data.json record.
+        """
         password_target = PasswordTarget(password_target_name)
-        with open(self.json_file, "r") as json_file:
-            data = json.load(json_file)[password_target.name]
-            password_target.min_uppers = data["min_uppers"]
-            password_target.min_lowers = data["min_lowers"]
-            password_target.min_digits = data["min_digits"]
-            password_target.length = data["length"]
+        password_target.min_uppers = data["min_uppers"]
+        password_target.min_lowers = data["min_lowers"]
+        password_target.min_digits = data["min_digits"]
+        password_target.length = data["length"]
         return password_target
 
     def read_target_data_from_obj(self, password_target: PasswordTarget):
@@ -89,17 +157,25 @@ class DataHandler:
             "length": password_target.length,
         }
 
+    def _record_from_obj(self, password_target: PasswordTarget) -> dict:
+        """
+        Build the stored record of a PasswordTarget. The name is the record key,
+        so it is not repeated inside the record.
+        """
+        record = self.read_target_data_from_obj(password_target)
+        del record["name"]
+        return record
+
     def add_password_target(self, password_target: PasswordTarget) -> None:
         """
         Add the password target to the data.json file.
         """
-        with open(self.json_file, "r+") as json_file:
-            data = json.load(json_file)
-            data[password_target.name] = self.read_target_data_from_obj(password_target)
-            json_file.seek(0)
-            json.dump(data, json_file, indent=4)
-            json_file.truncate()
-            
+        with self._journal_lock():
+            data = self._load()
+            data[password_target.name] = self._record_from_obj(password_target)
+            self._dump(data)
+            self._record_changes([password_target.name], data)
+
     def delete_password_target(self, password_target: PasswordTarget) -> None:
         """
         remove the password target from the data.json file
@@ -107,10 +183,335 @@ class DataHandler:
         Args:
             password_target (PasswordTarget): password target object
         """
-        with open(self.json_file, "r+") as json_file:
-            data = json.load(json_file)
+        with self._journal_lock():
+            data = self._load()
             if password_target.name in data:
                 del data[password_target.name]
-            json_file.seek(0)
-            json.dump(data, json_file, indent=4)
-            json_file.truncate()
+                self._dump(data)
+                self._record_changes([password_target.name], data)
+
+    def last_seq(self) -> int:
+        """
+        Sequence number of the latest change recorded by this node.
+
+        Returns:
+            int: latest sequence number, 0 if nothing was recorded
+        """
+        return self._journal_tail()["seq"]
+
+    def changes_since(self, seq: int) -> List[dict]:
+        """
+        Export the changes recorded after a sequence number.
+
+        Only the latest change of each target is exported, with the target's
+        current record.
+
+        Args:
+            seq (int): last sequence number already received from this node
+
+        Returns:
+            List[dict]: changes ordered by sequence number, each with the keys
+            seq, clock, node, name and record (None for a deletion)
+        """
+        entries = self._scan_journal()[1]
+        data = self._load()
+        changes = []
+        for entry in sorted(entries.values(), key=lambda entry: entry["seq"]):
+            if entry["seq"] <= seq:
+                continue
+            record = None
+            if not entry["deleted"]:
+                if entry["name"] not in data:
+                    # mutation interrupted before it reached the journal
+                    continue
+                record = self._normalize_record(data[entry["name"]])
+            changes.append(
+                {
+                    "seq": entry["seq"],
+                    "clock": entry["clock"],
+                    "node": entry["node"],
+                    "name": entry["name"],
+                    "record": record,
+                }
+            )
+        return changes
+
+    def apply_changes(self, changes: List[dict]) -> int:
+        """
+        Merge changes exported by another node with changes_since.
+
+        A change wins over the local state of its target when its
+        (clock, node) pair is greater, so every node converges to the same
+        data whatever the order of the syncs. Changes whose record is
+        already the local one are skipped.
+
+        Args:
+            changes (List[dict]): changes exported by another node
+
+        Returns:
+            int: number of changes applied
+        """
+        with self._journal_lock():
+            entries = self._scan_journal()[1]
+            tail = self._journal_tail()
+            lamport = tail["lamport"]
+            data = self._load()
+            winners = {}
+            for change in changes:
+                lamport = max(lamport, change["clock"])
+                name = change["name"]
+                current = winners.get(name) or entries.get(name)
+                if current is not None and self._version(change) <= self._version(
+                    current
+                ):
+                    continue
+                local_record = data.get(name)
+                if change["record"] == (
+                    None
+                    if local_record is None
+                    else self._normalize_record(local_record)
+                ):
+                    continue
+                winners[name] = change
+            if winners:
+                for name, change in winners.items():
+                    if change["record"] is None:
+                        data.pop(name, None)
+                    else:
+                        data[name] = change["record"]
+                self._dump(data)
+            seq = tail["seq"]
+            new_lines = []
+            for name, change in winners.items():
+                seq += 1
+                new_lines.append(
+                    {
+                        "seq": seq,
+                        "lamport": lamport,
+                        "name": name,
+                        "clock": change["clock"],
+                        "node": change["node"],
+                        "deleted": change["record"] is None,
+                    }
+                )
+            if not new_lines and lamport > tail["lamport"]:
+                # remember the clocks seen, so later local changes win over them
+                new_lines.append({"seq": seq, "lamport": lamport})
+            self._append_journal(new_lines)
+            self._compact_if_needed(len(data))
+        return len(winners)
+
+    def compact(self, tombstone_horizon: Optional[int] = None) -> None:
+        """
+        Rewrite the journal keeping only the latest change of each target.
+
+        Args:
+            tombstone_horizon (int): drop the deletions recorded at or before this
+                sequence number, i.e. already received by every node. None keeps
+                every tombstone.
+        """
+        with self._journal_lock():
+            self._compact(tombstone_horizon)
+
+    @staticmethod
+    def _version(change: dict) -> tuple:
+        """
+        Ordering key used to resolve conflicting changes of a target.
+        """
+        return (change["clock"], change["node"])
+
+    @staticmethod
+    def _normalize_record(record: dict) -> dict:
+        """
+        Record without the name older data.json files store inside it.
+        """
+        return {key: value for key, value in record.items() if key != "name"}
+
+    def _load(self) -> dict:
+        return load_file(self.json_file)
+
+    def _dump(self, data: dict) -> None:
+        dump_file(data, self.json_file, self.serializer)
+
+    def _open_journal(self, node_id: Optional[str]) -> str:
+        """
+        Open the journal, creating it from the current data.json content if missing.
+        Existing records are seeded at clock 0, so any later edit wins over them.
+
+        Args:
+            node_id (str): name of this node, None to keep the stored one or generate one
+
+        Returns:
+            str: name of this node
+        """
+        with self._journal_lock():
+            if os.path.isfile(self.journal_file):
+                with open(self.journal_file, "r") as journal_file:
+                    header = json.loads(journal_file.readline())
+                if node_id is None or node_id == header["node_id"]:
+                    return header["node_id"]
+                self.node_id = node_id
+                self._compact()
+                return node_id
+            node_id = node_id or uuid.uuid4().hex
+            lines = [{"node_id": node_id, "seq": 0, "lamport": 0}]
+            for seq, name in enumerate(self._load(), start=1):
+                lines.append(
+                    {
+                        "seq": seq,
+                        "lamport": 0,
+                        "name": name,
+                        "clock": 0,
+                        "node": node_id,
+                        "deleted": False,
+                    }
+                )
+            self._write_journal(lines)
+            return node_id
+
+    def _scan_journal(self) -> tuple:
+        """
+        Read the whole journal.
+
+        Returns:
+            tuple: number of lines, target name -> latest journal entry
+        """
+        entries = {}
+        lines = 0
+        with open(self.journal_file, "rb") as journal_file:
+            for line in journal_file:
+                lines += 1
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    if line.endswith(b"\n"):
+                        raise
+                    # last line torn by an interrupted append
+                    break
+                if "name" in entry:
+                    entries[entry["name"]] = entry
+        return lines, entries
+
+    def _journal_tail(self) -> dict:
+        """
+        Last journal line, which holds the current seq and lamport clock.
+        """
+        with open(self.journal_file, "rb") as journal_file:
+            journal_file.seek(0, os.SEEK_END)
+            position = journal_file.tell()
+            buffer = b""
+            while position > 0:
+                step = min(4096, position)
+                position -= step
+                journal_file.seek(position)
+                buffer = journal_file.read(step) + buffer
+                lines = buffer.split(b"\n")
+                # lines[0] may be cut, lines[-1] is empty or a torn append
+                for line in reversed(lines[1:-1] if position else lines[:-1]):
+                    if line.strip():
+                        return json.loads(line)
+        raise ValueError(f"{self.journal_file} is empty")
+
+    def _append_journal(self, lines: List[dict]) -> None:
+        if not lines:
+            return
+        with open(self.journal_file, "ab+") as journal_file:
+            journal_file.seek(0, os.SEEK_END)
+            prefix = b""
+            if journal_file.tell():
+                journal_file.seek(-1, os.SEEK_END)
+                if journal_file.read(1) != b"\n":
+                    # finish a line torn by an interrupted append
+                    prefix = b"\n"
+            journal_file.write(
+                prefix + b"".join(json.dumps(line).encode() + b"\n" for line in lines)
+            )
+
+    def _write_journal(self, lines: List[dict]) -> None:
+        write_atomic(
+            self.journal_file,
+            b"".join(json.dumps(line).encode() + b"\n" for line in lines),
+        )
+
+    def _compact(self, tombstone_horizon: Optional[int] = None) -> None:
+        """
+        Rewrite the journal, see compact. The journal lock must be held.
+        """
+        tail = self._journal_tail()
+        entries = self._scan_journal()[1]
+        lines = [{"node_id": self.node_id, "seq": 0, "lamport": 0}]
+        for entry in sorted(entries.values(), key=lambda entry: entry["seq"]):
+            if (
+                entry["deleted"]
+                and tombstone_horizon is not None
+                and entry["seq"] <= tombstone_horizon
+            ):
+                continue
+            lines.append(entry)
+        lines.append({"seq": tail["seq"], "lamport": tail["lamport"]})
+        self._write_journal(lines)
+
+    def _compact_if_needed(self, targets: int) -> None:
+        """
+        Compact the journal once it holds more than two lines per target plus
+        COMPACT_SLACK. The journal lock must be held.
+
+        Args:
+            targets (int): number of targets in data.json
+        """
+        with open(self.journal_file, "rb") as journal_file:
+            lines = sum(
+                chunk.count(b"\n")
+                for chunk in iter(lambda: journal_file.read(1 << 20), b"")
+            )
+        # every target has a journal entry, so this cheap check comes first
+        if lines <= 2 * targets + COMPACT_SLACK:
+            return
+        lines, entries = self._scan_journal()
+        if lines > 2 * len(entries) + COMPACT_SLACK:
+            self._compact()
+
+    @contextlib.contextmanager
+    def _journal_lock(self):
+        """
+        Serialize data.json and journal updates between processes and
+        threads, where fcntl is available. The lock is not reentrant.
+        """
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_file, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _record_changes(self, names: List[str], data: dict) -> None:
+        """
+        Record local mutations in the journal. The journal lock must be held
+        from the load of data.json, so no other writer slips in between.
+
+        Args:
+            names (List[str]): changed target names
+            data (dict): data.json content just written, without the
+                deleted targets
+        """
+        tail = self._journal_tail()
+        seq = tail["seq"]
+        clock = tail["lamport"] + 1
+        lines = []
+        for name in names:
+            seq += 1
+            lines.append(
+                {
+                    "seq": seq,
+                    "lamport": clock,
+                    "name": name,
+                    "clock": clock,
+                    "node": self.node_id,
+                    "deleted": name not in data,
+                }
+            )
+        self._append_journal(lines)
+        self._compact_if_needed(len(data))
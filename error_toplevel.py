@@ -16,6 +16,8 @@ class ErrorToplevel:
     Methods
     -------
 
+    show(text) : display the window with the given error message
+    hide() : hide the window so it can be shown again later
     ok_callback : ctk.CTkButton
     set_up_error_toplevel : ctk.CTkToplevel
 
@@ -23,7 +25,7 @@ class ErrorToplevel:
     --------
     >>> import customtkinter as ctk
     >>> root = ctk.CTk()
-    >>> ErrorToplevel(root)
+    >>> ErrorToplevel(root).show("no hash key")
     >>> root.mainloop()
 
     """
@@ -37,11 +39,30 @@ class ErrorToplevel:
         self.window = ctk.CTkToplevel(master)
         self._set_up_error_toplevel()
 
+    def show(self, text: str) -> None:
+        """
+        Display the window with the given error message.
+
+        Parameters
+        ----------
+        text (str): error message to display
+        """
+        self.window.label.configure(text=text)
+        self.window.deiconify()
+        self.window.lift()
+        self.window.focus()
+
+    def hide(self) -> None:
+        """
+        Hide the window, keeping its widgets for the next error.
+        """
+        self.window.withdraw()
+
     def _ok_callback(self) -> None:
         """
-        Callback for OK button, destroy the window.
+        Callback for OK button, hide the window.
         """
-        self.window.destroy()
+        self.hide()
 
     def _set_up_error_toplevel(self) -> None:
         """
@@ -49,6 +70,7 @@ class ErrorToplevel:
         """
         self.window.geometry("300x150")
         self.window.title("Error")
+        self.window.protocol("WM_DELETE_WINDOW", self.hide)
         self.window.label = ctk.CTkLabel(self.window, text="Error")
         self.window.label.pack(padx=20, pady=20)
         self.window.ok_btn = ctk.CTkButton(
@@ -0,0 +1,391 @@
+import hashlib
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
+from password_target import PasswordTarget
+from password_generator import (
+    OUTPUT_VERSION,
+    PasswordGenerator,
+    PasswordGeneratorProtocol,
+)
+
+ENGINE_ENV_VAR = "PASSWORD_GENERATOR_ENGINE"
+
+# hex digit -> replacement when a digit is turned into a letter or a letter into a digit
+_DIGIT_TO_UPPER = {digit: chr(int(digit) % 26 + 65) for digit in "0123456789"}
+_DIGIT_TO_LOWER = {digit: chr(int(digit) % 26 + 97) for digit in "0123456789"}
+_LOWER_TO_DIGIT = {letter: str(ord(letter) % 10) for letter in "abcdef"}
+
+
+class FastPasswordGenerator:
+    """
+    Optimized single-threaded engine.
+
+    Builds the password in one pass over the digest with lookup tables
+    instead of rebuilding the string for every character. Unlike
+    PasswordGenerator it leaves the password target counters untouched.
+    """
+
+    name = "fast"
+    compatibility_version = OUTPUT_VERSION
+
+    def generate_password(self, password_target: PasswordTarget, hash_key: str) -> str:
+        """
+        Generates a password based on a password target and a hash key.
+
+        Args:
+            password_target (PasswordTarget): Password target object.
+            hash_key (str): input hash key
+
+        Returns:
+            str: target generated password
+        """
+        digest = hashlib.sha512((password_target.name + hash_key).encode()).hexdigest()
+        length = password_target.length
+        if length > len(digest):
+            raise IndexError("string index out of range")
+        uppers = password_target.min_uppers
+        lowers = password_target.min_lowers
+        digits = password_target.min_digits
+        chars = []
+        for char in digest[:length]:
+            if char <= "9":
+                if digits > 0:
+                    digits -= 1
+                elif uppers > 0:
+                    uppers -= 1
+                    char = _DIGIT_TO_UPPER[char]
+                elif lowers > 0:
+                    lowers -= 1
+                    char = _DIGIT_TO_LOWER[char]
+            elif lowers > 0:
+                lowers -= 1
+            elif uppers > 0:
+                uppers -= 1
+                char = char.upper()
+            elif digits > 0:
+                digits -= 1
+                char = _LOWER_TO_DIGIT[char]
+            chars.append(char)
+        return "".join(chars)
+
+    def generate_passwords(
+        self, password_targets: Sequence[PasswordTarget], hash_key: str
+    ) -> List[str]:
+        """
+        Generates a password for each password target with the same hash key.
+        """
+        generate_password = self.generate_password
+        return [
+            generate_password(password_target, hash_key)
+            for password_target in password_targets
+        ]
+
+
+def _generate_chunk(records: List[tuple], hash_key: str) -> List[str]:
+    """
+    Generates the passwords of a chunk of target records. Runs in a worker process.
+    """
+    engine = FastPasswordGenerator()
+    passwords = []
+    for name, min_uppers, min_lowers, min_digits, length in records:
+        password_target = PasswordTarget(name)
+        password_target.min_uppers = min_uppers
+        password_target.min_lowers = min_lowers
+        password_target.min_digits = min_digits
+        password_target.length = length
+        passwords.append(engine.generate_password(password_target, hash_key))
+    return passwords
+
+
+class ProcessPoolPasswordGenerator:
+    """
+    Batch engine spreading generate_passwords over worker processes.
+
+    Single passwords are generated inline with FastPasswordGenerator. The
+    process pool is started on the first batch and reused until close().
+
+    Attributes
+    ----------
+    workers : int | None, number of worker processes (None for one per CPU)
+    chunk_size : int, number of targets sent to a worker at once
+    """
+
+    name = "process-pool"
+    compatibility_version = OUTPUT_VERSION
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = 1000) -> None:
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self._fast = FastPasswordGenerator()
+        self._executor = None
+
+    def generate_password(self, password_target: PasswordTarget, hash_key: str) -> str:
+        """
+        Generates a password based on a password target and a hash key.
+        """
+        return self._fast.generate_password(password_target, hash_key)
+
+    def generate_passwords(
+        self, password_targets: Sequence[PasswordTarget], hash_key: str
+    ) -> List[str]:
+        """
+        Generates a password for each password target with the same hash key.
+        """
+        records = [
+            (
+                password_target.name,
+                password_target.min_uppers,
+                password_target.min_lowers,
+                password_target.min_digits,
+                password_target.length,
+            )
+            for password_target in password_targets
+        ]
+        if len(records) <= self.chunk_size:
+            return _generate_chunk(records, hash_key)
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        chunks = [
+            records[start : start + self.chunk_size]
+            for start in range(0, len(records), self.chunk_size)
+        ]
+        passwords = []
+        for chunk_passwords in self._executor.map(
+            _generate_chunk, chunks, [hash_key] * len(chunks)
+        ):
+            passwords.extend(chunk_passwords)
+        return passwords
+
+    def close(self) -> None:
+        """
+        Shuts the worker processes down.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+ENGINES: Dict[str, Callable[[], PasswordGeneratorProtocol]] = {}
+
+
+def register_engine(
+    name: str, factory: Callable[[], PasswordGeneratorProtocol]
+) -> None:
+    """
+    Registers a generator engine.
+
+    Args:
+        name (str): engine name
+        factory (Callable[[], PasswordGeneratorProtocol]): builds the engine,
+            may raise ImportError when an optional dependency is missing
+    """
+    ENGINES[name] = factory
+
+
+def get_engine(name: str) -> PasswordGeneratorProtocol:
+    """
+    Builds a registered engine by name.
+    """
+    if name not in ENGINES:
+        raise ValueError(f"unknown engine {name!r}, expected one of {list(ENGINES)}")
+    return ENGINES[name]()
+
+
+def available_engines(
+    compatibility_version: int = OUTPUT_VERSION,
+) -> Dict[str, PasswordGeneratorProtocol]:
+    """
+    Builds every registered engine producing the given output version,
+    skipping engines whose dependencies are missing.
+    """
+    engines = {}
+    for name in ENGINES:
+        try:
+            engine = get_engine(name)
+        except ImportError:
+            continue
+        if engine.compatibility_version == compatibility_version:
+            engines[name] = engine
+    return engines
+
+
+register_engine(PasswordGenerator.name, PasswordGenerator)
+register_engine(FastPasswordGenerator.name, FastPasswordGenerator)
+register_engine(ProcessPoolPasswordGenerator.name, ProcessPoolPasswordGenerator)
+
+
+def _sample_targets(size: int) -> List[PasswordTarget]:
+    targets = []
+    for idx in range(size):
+        password_target = PasswordTarget(f"calibration-{idx}.example.com")
+        password_target.min_uppers = idx % 4
+        password_target.min_lowers = idx % 5
+        password_target.min_digits = idx % 3
+        password_target.length = 8 + idx % 20
+        targets.append(password_target)
+    return targets
+
+
+def _copy_targets(password_targets: List[PasswordTarget]) -> List[PasswordTarget]:
+    # fresh targets for each run, in case an engine does not honour the protocol
+    copies = []
+    for password_target in password_targets:
+        copy = PasswordTarget(password_target.name)
+        copy.min_uppers = password_target.min_uppers
+        copy.min_lowers = password_target.min_lowers
+        copy.min_digits = password_target.min_digits
+        copy.length = password_target.length
+        copies.append(copy)
+    return copies
+
+
+class EngineSelector:
+    """
+    Picks the fastest available engine for a workload size on this machine.
+
+    Workload sizes are grouped in powers of ten. The first select() for a
+    size group times every compatible engine on a sample batch of that size
+    (capped at max_calibration_size) and remembers the fastest one. Engines
+    whose output differs from the reference PasswordGenerator are discarded.
+
+    Attributes
+    ----------
+    override : str | None, engine name forced for every workload, defaults
+        to the PASSWORD_GENERATOR_ENGINE environment variable
+    compatibility_version : int
+    max_calibration_size : int
+    timings : Dict[int, Dict[str, float]], size group -> engine -> seconds per password
+    choices : Dict[int, str], size group -> selected engine name
+
+    Methods
+    -------
+    select(workload_size): engine to use for a workload
+    calibrate(sizes): time the engines on the given size groups
+    report(): text table of the calibration results
+    close(keep): release engine resources such as worker processes
+    """
+
+    def __init__(
+        self,
+        override: Optional[str] = None,
+        compatibility_version: int = OUTPUT_VERSION,
+        max_calibration_size: int = 10_000,
+        repeat: int = 3,
+    ) -> None:
+        self.override = override or os.environ.get(ENGINE_ENV_VAR) or None
+        self.compatibility_version = compatibility_version
+        self.max_calibration_size = max_calibration_size
+        self.repeat = repeat
+        self.timings: Dict[int, Dict[str, float]] = {}
+        self.choices: Dict[int, str] = {}
+        self._engines: Optional[Dict[str, PasswordGeneratorProtocol]] = None
+
+    @property
+    def engines(self) -> Dict[str, PasswordGeneratorProtocol]:
+        if self._engines is None:
+            self._engines = available_engines(self.compatibility_version)
+        return self._engines
+
+    def size_group(self, workload_size: int) -> int:
+        """
+        Power of ten a workload size is calibrated with.
+        """
+        group = 10 ** int(math.log10(max(workload_size, 1)))
+        return min(group, self.max_calibration_size)
+
+    def select(self, workload_size: int = 1) -> PasswordGeneratorProtocol:
+        """
+        Returns the engine to use for a workload, calibrating its size group if needed.
+
+        Args:
+            workload_size (int): number of passwords generated together
+
+        Returns:
+            PasswordGeneratorProtocol: selected engine
+        """
+        if self.override:
+            if self.override not in self.engines:
+                raise ValueError(
+                    f"engine {self.override!r} is not available for output "
+                    f"version {self.compatibility_version}"
+                )
+            return self.engines[self.override]
+        group = self.size_group(workload_size)
+        if group not in self.choices:
+            self.calibrate([group])
+        return self.engines[self.choices[group]]
+
+    def calibrate(self, sizes: Sequence[int] = (1, 100, 10_000)) -> Dict[int, str]:
+        """
+        Times every available engine on sample batches and records the fastest.
+
+        Args:
+            sizes (Sequence[int]): workload sizes to calibrate
+
+        Returns:
+            Dict[int, str]: size group -> selected engine name
+        """
+        hash_key = "calibration-key"
+        for size in sizes:
+            group = self.size_group(size)
+            targets = _sample_targets(group)
+            expected = PasswordGenerator().generate_passwords(
+                _copy_targets(targets), hash_key
+            )
+            timings = {}
+            for name, engine in self.engines.items():
+                # warm up, e.g. start worker processes, and check compatibility
+                if (
+                    engine.generate_passwords(_copy_targets(targets), hash_key)
+                    != expected
+                ):
+                    continue
+                best = float("inf")
+                for _ in range(self.repeat):
+                    batch = _copy_targets(targets)
+                    start = time.perf_counter()
+                    engine.generate_passwords(batch, hash_key)
+                    best = min(best, time.perf_counter() - start)
+                timings[name] = best / group
+            self.timings[group] = timings
+            self.choices[group] = min(timings, key=timings.get)
+        # stop e.g. worker processes started while timing engines not selected
+        self.close(keep=set(self.choices.values()))
+        return dict(self.choices)
+
+    def close(self, keep: Sequence[str] = ()) -> None:
+        """
+        Releases the resources of the built engines that have a close() method.
+
+        Args:
+            keep (Sequence[str]): names of the engines left open
+        """
+        for name, engine in self.engines.items():
+            close = getattr(engine, "close", None)
+            if name not in keep and close is not None:
+                close()
+
+    def report(self) -> str:
+        """
+        Text table of the calibration results.
+        """
+        lines = []
+        if self.override:
+            lines.append(f"override: {self.override}")
+        for group in sorted(self.timings):
+            lines.append(f"workload ~{group}: {self.choices[group]}")
+            for name, seconds in sorted(
+                self.timings[group].items(), key=lambda item: item[1]
+            ):
+                lines.append(f"  {name:<14} {seconds * 1e6:10.2f} us/password")
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    selector = EngineSelector()
+    selector.calibrate()
+    print(selector.report())
+    selector.close()
@@ -0,0 +1,500 @@
+import argparse
+import multiprocessing
+import os
+import queue
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, NamedTuple, Optional
+from password_target import PasswordTarget
+from data_handler import DataHandler
+from generator_engines import get_engine
+from serializers import dump_file, load_file, resolve_serializer
+
+OPERATIONS = ("generate", "contains", "read", "update")
+DEFAULT_MIX = {"generate": 70, "contains": 10, "read": 15, "update": 5}
+REQUIREMENTS = ("min_uppers", "min_lowers", "min_digits", "length")
+# errors raised outside the operations: client startup, crashed or hung processes
+CLIENT = "client"
+# seconds a process client may run past the test duration before it is killed
+PROCESS_GRACE = 30.0
+
+
+class CheckFailed(Exception):
+    """
+    An operation returned a wrong answer without raising.
+    """
+
+
+@dataclass
+class LoadTestConfig:
+    """
+    Parameters of a load test run.
+
+    Attributes
+    ----------
+    threads : int, number of thread clients
+    processes : int, number of process clients
+    duration : float, seconds each client runs
+    mix : Dict[str, int], operation -> relative weight
+    targets : int, number of targets in the scratch catalogue
+    engine : str, generator engine name
+    serializer : str | None, catalogue serializer name (None for the file extension default)
+    """
+
+    threads: int = 4
+    processes: int = 0
+    duration: float = 10.0
+    mix: Dict[str, int] = field(default_factory=lambda: dict(DEFAULT_MIX))
+    targets: int = 1000
+    engine: str = "python"
+    serializer: Optional[str] = None
+
+
+class Write(NamedTuple):
+    """
+    A successful update, used to check no update was lost.
+
+    Attributes
+    ----------
+    name : str, target name
+    record : tuple, written requirements in REQUIREMENTS order
+    start : float, time.time() before the call
+    end : float, time.time() after the call returned
+    """
+
+    name: str
+    record: tuple
+    start: float
+    end: float
+
+
+@dataclass
+class ClientResult:
+    """
+    Measurements of one client, or of all of them once merged.
+
+    Attributes
+    ----------
+    latencies : Dict[str, List[float]], operation -> seconds of each successful call
+    errors : Dict[str, Counter], operation (or CLIENT) -> exception type -> count
+    writes : List[Write], successful updates
+    """
+
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: Dict[str, Counter] = field(default_factory=lambda: defaultdict(Counter))
+    writes: List[Write] = field(default_factory=list)
+
+    def merge(self, other: "ClientResult") -> None:
+        for operation, latencies in other.latencies.items():
+            self.latencies[operation].extend(latencies)
+        for operation, errors in other.errors.items():
+            self.errors[operation].update(errors)
+        self.writes.extend(other.writes)
+
+
+@dataclass
+class LoadTestReport:
+    """
+    Outcome of a load test run.
+
+    Attributes
+    ----------
+    config : LoadTestConfig
+    result : ClientResult
+    elapsed : float, wall clock seconds of the run
+    corruption : List[str], problems found in the catalogue afterwards
+    """
+
+    config: LoadTestConfig
+    result: ClientResult
+    elapsed: float
+    corruption: List[str]
+
+    def summary(self) -> str:
+        """
+        Human readable summary with per-operation latency percentiles.
+        """
+        clients = self.config.threads + self.config.processes
+        total_ok = sum(len(latencies) for latencies in self.result.latencies.values())
+        total_errors = sum(
+            sum(errors.values()) for errors in self.result.errors.values()
+        )
+        lines = [
+            f"{clients} clients ({self.config.threads} threads, "
+            f"{self.config.processes} processes), {self.config.targets} targets, "
+            f"{self.elapsed:.1f}s",
+            f"throughput: {total_ok / self.elapsed:.0f} ops/s, errors: {total_errors}",
+            f"{'operation':<10} {'ops':>8} {'ops/s':>8} {'p50 ms':>8} "
+            f"{'p95 ms':>8} {'p99 ms':>8} {'errors':>7}",
+        ]
+        for operation in OPERATIONS + (CLIENT,):
+            latencies = sorted(self.result.latencies.get(operation, []))
+            errors = self.result.errors.get(operation, Counter())
+            if not latencies and not errors:
+                continue
+            p50, p95, p99 = (percentile(latencies, q) * 1000 for q in (50, 95, 99))
+            lines.append(
+                f"{operation:<10} {len(latencies):>8} "
+                f"{len(latencies) / self.elapsed:>8.0f} {p50:>8.2f} {p95:>8.2f} "
+                f"{p99:>8.2f} {sum(errors.values()):>7}"
+            )
+            for error, count in errors.most_common():
+                lines.append(f"  {error}: {count}")
+        if self.corruption:
+            lines.append(f"catalogue corrupted ({len(self.corruption)} problems):")
+            lines.extend(f"  {problem}" for problem in self.corruption[:20])
+        else:
+            lines.append("catalogue intact")
+        return "\n".join(lines)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """
+    Nearest-rank percentile of sorted values, 0.0 when empty.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def _target_name(idx: int) -> str:
+    return f"load-{idx}.example.com"
+
+
+def _initial_record(idx: int) -> dict:
+    return {
+        "min_uppers": idx % 4,
+        "min_lowers": idx % 5,
+        "min_digits": idx % 3,
+        "length": 12 + idx % 18,
+    }
+
+
+def create_catalogue(directory: str, config: LoadTestConfig) -> str:
+    """
+    Writes a scratch catalogue of config.targets targets.
+
+    Returns:
+        str: catalogue path
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "data.json")
+    data = {_target_name(idx): _initial_record(idx) for idx in range(config.targets)}
+    dump_file(data, path, resolve_serializer(config.serializer, path))
+    # seeds the change journal from the catalogue
+    DataHandler(path, node_id="load-test", serializer=config.serializer)
+    return path
+
+
+def _check_target(password_target: PasswordTarget, name: str) -> None:
+    if password_target.name != name:
+        raise CheckFailed(f"read {password_target.name!r} instead of {name!r}")
+    for requirement in REQUIREMENTS:
+        if not isinstance(getattr(password_target, requirement), int):
+            raise CheckFailed(f"{name} has invalid {requirement}")
+
+
+def run_client(path: str, config: LoadTestConfig, seed: int) -> ClientResult:
+    """
+    Runs random operations against the catalogue until config.duration elapses.
+
+    Every scratch target exists, so a wrong answer (contains() returning
+    False, a read returning another or a malformed target) counts as a
+    CheckFailed error. Successful updates are kept in the result writes.
+    """
+    rng = random.Random(seed)
+    data_handler = DataHandler(path, serializer=config.serializer)
+    engine = get_engine(config.engine)
+    operations = list(config.mix)
+    weights = [config.mix[operation] for operation in operations]
+    result = ClientResult()
+    deadline = time.perf_counter() + config.duration
+    while time.perf_counter() < deadline:
+        operation = rng.choices(operations, weights)[0]
+        name = _target_name(rng.randrange(config.targets))
+        start = time.perf_counter()
+        try:
+            if operation == "generate":
+                password_target = data_handler.read_target_data_from_file(name)
+                _check_target(password_target, name)
+                length = password_target.length
+                password = engine.generate_password(password_target, f"key-{seed}")
+                if len(password) != length:
+                    raise CheckFailed(f"{name} password is not {length} long")
+            elif operation == "contains":
+                if not data_handler.contains(name):
+                    raise CheckFailed(f"{name} not found")
+            elif operation == "read":
+                _check_target(data_handler.read_target_data_from_file(name), name)
+            elif operation == "update":
+                password_target = PasswordTarget(name)
+                password_target.min_uppers = rng.randrange(4)
+                password_target.min_lowers = rng.randrange(4)
+                password_target.min_digits = rng.randrange(4)
+                password_target.length = rng.randrange(12, 30)
+                write_start = time.time()
+                data_handler.update_data_file(password_target)
+                result.writes.append(
+                    Write(
+                        name,
+                        tuple(getattr(password_target, key) for key in REQUIREMENTS),
+                        write_start,
+                        time.time(),
+                    )
+                )
+            else:
+                raise ValueError(f"unknown operation {operation!r}")
+        except Exception as error:
+            result.errors[operation][type(error).__name__] += 1
+            continue
+        result.latencies[operation].append(time.perf_counter() - start)
+    return result
+
+
+def _safe_run_client(path: str, config: LoadTestConfig, seed: int) -> ClientResult:
+    """
+    Runs a client, turning a failure outside the operations into a CLIENT error.
+    """
+    try:
+        return run_client(path, config, seed)
+    except Exception as error:
+        result = ClientResult()
+        result.errors[CLIENT][type(error).__name__] += 1
+        return result
+
+
+def _process_client(
+    path: str, config: LoadTestConfig, seed: int, results: multiprocessing.Queue
+) -> None:
+    result = _safe_run_client(path, config, seed)
+    results.put((seed, dict(result.latencies), dict(result.errors), result.writes))
+
+
+def _collect_process_results(
+    processes: Dict[int, multiprocessing.Process],
+    results: multiprocessing.Queue,
+    deadline: float,
+) -> List[ClientResult]:
+    """
+    Reads the result of every process client. A process that exits without
+    a result or runs past the deadline is counted as a CLIENT error.
+    """
+    collected = []
+    pending = dict(processes)
+    while pending:
+        try:
+            seed, latencies, errors, writes = results.get(timeout=0.5)
+        except queue.Empty:
+            for seed, process in list(pending.items()):
+                if process.exitcode not in (None, 0):
+                    # died before putting its result
+                    result = ClientResult()
+                    result.errors[CLIENT][f"exit code {process.exitcode}"] += 1
+                    collected.append(result)
+                    del pending[seed]
+            if pending and time.perf_counter() > deadline:
+                for process in pending.values():
+                    process.terminate()
+                result = ClientResult()
+                result.errors[CLIENT]["Timeout"] += len(pending)
+                collected.append(result)
+                pending.clear()
+            continue
+        result = ClientResult()
+        result.latencies.update(latencies)
+        result.errors.update(errors)
+        result.writes.extend(Write(*write) for write in writes)
+        collected.append(result)
+        pending.pop(seed, None)
+    return collected
+
+
+def _lost_update(record: dict, initial: dict, writes: List[Write]) -> Optional[str]:
+    """
+    Checks a target holds the value of its last completed write.
+
+    Writes overlapping in time may complete in either order, so the stored
+    value must come from a write that no other write started after.
+
+    Returns:
+        str | None: problem found, None if the record is a possible final value
+    """
+    stored = tuple(record.get(key) for key in REQUIREMENTS)
+    if not writes:
+        if stored != tuple(initial[key] for key in REQUIREMENTS):
+            return f"holds {stored} but was never updated"
+        return None
+    last_start = max(write.start for write in writes)
+    candidates = {write.record for write in writes if write.end >= last_start}
+    if stored not in candidates:
+        return f"lost update: holds {stored}, last writes were {sorted(candidates)}"
+    return None
+
+
+def check_catalogue(
+    path: str, config: LoadTestConfig, writes: Optional[List[Write]] = None
+) -> List[str]:
+    """
+    Looks for corruption and lost updates in the catalogue and its change
+    journal after a run.
+
+    Args:
+        path (str): catalogue path
+        config (LoadTestConfig): load test parameters
+        writes (List[Write]): successful updates of the run, None to skip the
+            lost update check
+
+    Returns:
+        List[str]: problems found, empty if the catalogue is intact
+    """
+    writes_by_name = defaultdict(list)
+    for write in writes or []:
+        writes_by_name[write.name].append(write)
+    problems = []
+    try:
+        data = load_file(path)
+    except Exception as error:
+        return [f"{path} does not load: {error!r}"]
+    for idx in range(config.targets):
+        name = _target_name(idx)
+        record = data.get(name)
+        if record is None:
+            problems.append(f"{name} missing")
+            continue
+        for requirement in REQUIREMENTS:
+            if not isinstance(record.get(requirement), int):
+                problems.append(f"{name} has invalid {requirement}")
+        if writes is not None:
+            problem = _lost_update(record, _initial_record(idx), writes_by_name[name])
+            if problem:
+                problems.append(f"{name} {problem}")
+    if len(data) != config.targets:
+        problems.append(f"expected {config.targets} targets, found {len(data)}")
+    try:
+        changes = DataHandler(path, serializer=config.serializer).changes_since(0)
+    except Exception as error:
+        problems.append(f"change journal does not load: {error!r}")
+    else:
+        # the journal's latest entry of each target must match the data file
+        journal = {change["name"]: change["record"] for change in changes}
+        for name in sorted(data):
+            if journal.get(name) is None:
+                problems.append(f"{name} has no live journal entry")
+    return problems
+
+
+def run_load_test(
+    config: LoadTestConfig, directory: Optional[str] = None
+) -> LoadTestReport:
+    """
+    Runs thread and process clients against a scratch catalogue.
+
+    Args:
+        config (LoadTestConfig): load test parameters
+        directory (str): where to create the scratch catalogue, a temporary
+            directory removed afterwards when None
+
+    Returns:
+        LoadTestReport: merged measurements and corruption check
+    """
+    unknown = set(config.mix) - set(OPERATIONS)
+    if unknown:
+        raise ValueError(f"unknown operations {sorted(unknown)}, expected {OPERATIONS}")
+    scratch = directory or tempfile.mkdtemp(prefix="password_load_test_")
+    try:
+        path = create_catalogue(scratch, config)
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda seed=seed: results.append(
+                    _safe_run_client(path, config, seed)
+                )
+            )
+            for seed in range(config.threads)
+        ]
+        process_results = multiprocessing.Queue()
+        processes = {
+            seed: multiprocessing.Process(
+                target=_process_client,
+                args=(path, config, seed, process_results),
+            )
+            for seed in range(config.threads, config.threads + config.processes)
+        }
+        start = time.perf_counter()
+        # fork the processes before starting threads, a child forked while a
+        # thread holds a lock could deadlock
+        for client in list(processes.values()) + threads:
+            client.start()
+        # drain the queue before joining, a child blocks until its result is read
+        results.extend(
+            _collect_process_results(
+                processes, process_results, start + config.duration + PROCESS_GRACE
+            )
+        )
+        for client in threads + list(processes.values()):
+            client.join()
+        elapsed = time.perf_counter() - start
+        merged = ClientResult()
+        for result in results:
+            merged.merge(result)
+        return LoadTestReport(
+            config, merged, elapsed, check_catalogue(path, config, merged.writes)
+        )
+    finally:
+        if directory is None:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+
+def _parse_mix(text: str) -> Dict[str, int]:
+    mix = {}
+    for item in text.split(","):
+        operation, _, weight = item.partition("=")
+        mix[operation.strip()] = int(weight)
+    return mix
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Load test generators and catalogue writers with concurrent clients."
+    )
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--processes", type=int, default=0)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument(
+        "--mix",
+        type=_parse_mix,
+        default=dict(DEFAULT_MIX),
+        help="operation weights, e.g. generate=70,contains=10,read=15,update=5",
+    )
+    parser.add_argument("--targets", type=int, default=1000)
+    parser.add_argument("--engine", default="python")
+    parser.add_argument("--serializer", default=None)
+    parser.add_argument(
+        "--dir", default=None, help="keep the scratch catalogue in this directory"
+    )
+    args = parser.parse_args(argv)
+
+    config = LoadTestConfig(
+        threads=args.threads,
+        processes=args.processes,
+        duration=args.duration,
+        mix=args.mix,
+        targets=args.targets,
+        engine=args.engine,
+        serializer=args.serializer,
+    )
+    report = run_load_test(config, args.dir)
+    print(report.summary())
+    errors = sum(sum(errors.values()) for errors in report.result.errors.values())
+    return 1 if report.corruption or errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,43 @@
+import copy
 import hashlib
+from typing import List, Protocol, Sequence, runtime_checkable
 from password_target import PasswordTarget
 
+# Version of the generated passwords. Engines declaring the same version
+# produce the same password for the same target and hash key.
+OUTPUT_VERSION = 1
+
+
+@runtime_checkable
+class PasswordGeneratorProtocol(Protocol):
+    """
+    Protocol implemented by every password generator engine.
+
+    Attributes
+    ----------
+    name : str, engine name in the registry
+    compatibility_version : int, OUTPUT_VERSION the engine output matches
+
+    Methods
+    -------
+    generate_password(password_target, hash_key): generate a single password
+    generate_passwords(password_targets, hash_key): generate a password per target
+
+    Engines must leave the caller's PasswordTarget objects unchanged.
+    """
+
+    name: str
+    compatibility_version: int
+
+    def generate_password(
+        self, password_target: PasswordTarget, hash_key: str
+    ) -> str: ...
+
+    def generate_passwords(
+        self, password_targets: Sequence[PasswordTarget], hash_key: str
+    ) -> List[str]: ...
+
 
-# TODO maybe turn into a protocol
 class PasswordGenerator:
     """
     This class generates passwords based on a password target.
@@ -14,8 +49,13 @@ class PasswordGenerator:
     The password is generated using the PasswordTarget object and a hash key, which is a string,
     according to the PasswordTarget attributes that represent the password target requirements.
 
+    This is the reference pure-Python engine of PasswordGeneratorProtocol.
+
     """
 
+    name = "python"
+    compatibility_version = OUTPUT_VERSION
+
     def generate_password(self, password_target: PasswordTarget, hash_key: str) -> str:
         """
         Generates a password based on a password target and a hash key.
@@ -27,7 +67,8 @@ class PasswordGenerator:
         Returns:
             str: target generated password
         """
-
+        # the character handlers consume the requirement counters
+        password_target = copy.copy(password_target)
         raw_password = self._generate_raw_password(password_target.name, hash_key)[
             : password_target.length
         ]
@@ -35,6 +76,24 @@ class PasswordGenerator:
             raw_password = self._modify_password(password_target, raw_password, idx)
         return raw_password
 
+    def generate_passwords(
+        self, password_targets: Sequence[PasswordTarget], hash_key: str
+    ) -> List[str]:
+        """
+        Generates a password for each password target with the same hash key.
+
+        Args:
+            password_targets (Sequence[PasswordTarget]): Password target objects.
+            hash_key (str): input hash key
+
+        Returns:
+            List[str]: generated passwords, in the order of password_targets
+        """
+        return [
+            self.generate_password(password_target, hash_key)
+            for password_target in password_targets
+        ]
+
     def _generate_raw_password(self, password_target_name: str, hash_key: str) -> str:
         """
         Generates a raw password based on a password target name and a hash key.
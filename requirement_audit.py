@@ -0,0 +1,326 @@
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from password_target import PasswordTarget
+from password_generator import PasswordGenerator
+from data_handler import DataHandler
+from generator_engines import ENGINES, get_engine
+from serializers import load_file
+
+DEFAULT_KEYS = ("audit-key-0", "audit-key-1", "audit-key-2", "audit-key-3")
+REQUIREMENTS = ("length", "min_uppers", "min_lowers", "min_digits")
+
+TargetRecord = Tuple[str, int, int, int, int]
+
+
+@dataclass
+class AuditFailure:
+    """
+    A generated password that does not meet its target requirements.
+
+    Attributes
+    ----------
+    target_name : str
+    hash_key : str
+    password : str (empty when generation raised)
+    unmet : Dict[str, Tuple[int, int]], requirement -> (required, actual)
+    error : str (exception raised by the generator, if any)
+    """
+
+    target_name: str
+    hash_key: str
+    password: str
+    unmet: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    error: str = ""
+
+
+@dataclass
+class AuditReport:
+    """
+    Result of auditing a catalogue against a set of sample keys.
+
+    Attributes
+    ----------
+    targets : int
+    checks : int, number of generated passwords
+    failures : List[AuditFailure]
+    unmet_counts : Dict[str, int], number of failing passwords per requirement
+    elapsed : float, seconds
+    """
+
+    targets: int = 0
+    checks: int = 0
+    failures: List[AuditFailure] = field(default_factory=list)
+    unmet_counts: Dict[str, int] = field(
+        default_factory=lambda: {requirement: 0 for requirement in REQUIREMENTS}
+    )
+    elapsed: float = 0.0
+
+    @property
+    def failing_targets(self) -> List[str]:
+        """
+        Names of the targets with at least one failing password, in catalogue order.
+        """
+        return list(dict.fromkeys(failure.target_name for failure in self.failures))
+
+    def merge(self, other: "AuditReport") -> None:
+        """
+        Adds the results of another (chunk) report to this one.
+        """
+        self.targets += other.targets
+        self.checks += other.checks
+        self.failures.extend(other.failures)
+        for requirement, count in other.unmet_counts.items():
+            self.unmet_counts[requirement] += count
+
+    def summary(self, max_failures: int = 20) -> str:
+        """
+        Human readable summary of the report.
+
+        Args:
+            max_failures (int): maximum number of failures listed
+
+        Returns:
+            str: summary text
+        """
+        failing_targets = self.failing_targets
+        rate = self.checks / self.elapsed if self.elapsed else 0.0
+        lines = [
+            f"audited {self.targets} targets, {self.checks} passwords "
+            f"in {self.elapsed:.2f}s ({rate:.0f} passwords/s)",
+            f"failing targets: {len(failing_targets)} "
+            f"({len(self.failures)} failing passwords)",
+        ]
+        for requirement in REQUIREMENTS:
+            lines.append(f"  unmet {requirement}: {self.unmet_counts[requirement]}")
+        for failure in self.failures[:max_failures]:
+            if failure.error:
+                detail = f"error: {failure.error}"
+            else:
+                detail = ", ".join(
+                    f"{requirement} {required} > {actual}"
+                    for requirement, (required, actual) in failure.unmet.items()
+                )
+            lines.append(f"  {failure.target_name!r} [{failure.hash_key}]: {detail}")
+        if len(self.failures) > max_failures:
+            lines.append(f"  ... {len(self.failures) - max_failures} more")
+        return "\n".join(lines)
+
+
+def check_password(
+    password_target: PasswordTarget, password: str
+) -> Dict[str, Tuple[int, int]]:
+    """
+    Checks a password against the requirements of its target.
+
+    Args:
+        password_target (PasswordTarget): target whose requirements are checked
+        password (str): generated password
+
+    Returns:
+        Dict[str, Tuple[int, int]]: unmet requirement -> (required, actual), empty if all are met
+    """
+    actual = {
+        "length": len(password),
+        "min_uppers": sum(char.isupper() for char in password),
+        "min_lowers": sum(char.islower() for char in password),
+        "min_digits": sum(char.isdigit() for char in password),
+    }
+    unmet = {}
+    if actual["length"] != password_target.length:
+        unmet["length"] = (password_target.length, actual["length"])
+    for requirement in REQUIREMENTS[1:]:
+        required = getattr(password_target, requirement)
+        if actual[requirement] < required:
+            unmet[requirement] = (required, actual[requirement])
+    return unmet
+
+
+def _to_record(password_target: PasswordTarget) -> TargetRecord:
+    return (
+        password_target.name,
+        password_target.min_uppers,
+        password_target.min_lowers,
+        password_target.min_digits,
+        password_target.length,
+    )
+
+
+def _from_record(record: TargetRecord) -> PasswordTarget:
+    password_target = PasswordTarget(record[0])
+    (
+        password_target.min_uppers,
+        password_target.min_lowers,
+        password_target.min_digits,
+        password_target.length,
+    ) = record[1:]
+    return password_target
+
+
+def _audit_chunk(
+    records: Sequence[TargetRecord], hash_keys: Sequence[str], engine: str
+) -> AuditReport:
+    """
+    Audits a chunk of target records. Runs in a worker process.
+    """
+    password_generator = get_engine(engine)
+    report = AuditReport(targets=len(records))
+    for record in records:
+        password_target = _from_record(record)
+        for hash_key in hash_keys:
+            report.checks += 1
+            try:
+                password = password_generator.generate_password(
+                    password_target, hash_key
+                )
+            except Exception as error:
+                report.failures.append(
+                    AuditFailure(record[0], hash_key, "", error=repr(error))
+                )
+                continue
+            unmet = check_password(password_target, password)
+            if unmet:
+                report.failures.append(
+                    AuditFailure(record[0], hash_key, password, unmet)
+                )
+                for requirement in unmet:
+                    report.unmet_counts[requirement] += 1
+    return report
+
+
+def _chunks(
+    records: List[TargetRecord], chunk_size: int
+) -> Iterator[List[TargetRecord]]:
+    for start in range(0, len(records), chunk_size):
+        yield records[start : start + chunk_size]
+
+
+def audit_targets(
+    password_targets: Sequence[PasswordTarget],
+    hash_keys: Sequence[str] = DEFAULT_KEYS,
+    workers: Optional[int] = None,
+    chunk_size: int = 2000,
+    engine: str = PasswordGenerator.name,
+) -> AuditReport:
+    """
+    Generates a password for every target and sample key in parallel and
+    verifies each one against the target requirements.
+
+    Args:
+        password_targets (Sequence[PasswordTarget]): targets to audit
+        hash_keys (Sequence[str]): sample hash keys
+        workers (int): number of worker processes, None for one per CPU, 0 to run inline
+        chunk_size (int): number of targets sent to a worker at once
+        engine (str): name of the generator engine audited, see generator_engines
+
+    Returns:
+        AuditReport: merged report, failures in catalogue order
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine {engine!r}, expected one of {list(ENGINES)}")
+    start = time.perf_counter()
+    records = [_to_record(password_target) for password_target in password_targets]
+    hash_keys = list(hash_keys)
+    report = AuditReport()
+    if workers == 0:
+        for chunk in _chunks(records, chunk_size):
+            report.merge(_audit_chunk(chunk, hash_keys, engine))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunks = list(_chunks(records, chunk_size))
+            for chunk_report in executor.map(
+                _audit_chunk,
+                chunks,
+                [hash_keys] * len(chunks),
+                [engine] * len(chunks),
+            ):
+                report.merge(chunk_report)
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def audit_catalogue(
+    data_handler: DataHandler,
+    hash_keys: Sequence[str] = DEFAULT_KEYS,
+    workers: Optional[int] = None,
+    chunk_size: int = 2000,
+    engine: str = PasswordGenerator.name,
+) -> AuditReport:
+    """
+    Audits every target stored by a DataHandler, see audit_targets.
+    """
+    return audit_targets(
+        data_handler.read_all_targets_from_file(),
+        hash_keys,
+        workers,
+        chunk_size,
+        engine,
+    )
+
+
+def load_targets(path: str) -> List[PasswordTarget]:
+    """
+    Reads the targets of a catalogue file without a DataHandler, which would
+    create its change journal and lock file next to it.
+    """
+    return [
+        _from_record(
+            (
+                name,
+                record["min_uppers"],
+                record["min_lowers"],
+                record["min_digits"],
+                record["length"],
+            )
+        )
+        for name, record in load_file(path).items()
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Check that generated passwords meet their target requirements."
+    )
+    parser.add_argument("--data", default="data.json", help="target catalogue")
+    parser.add_argument(
+        "--key",
+        action="append",
+        dest="keys",
+        help="sample hash key, may be repeated (default: built-in sample keys)",
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument(
+        "--engine",
+        default=PasswordGenerator.name,
+        choices=list(ENGINES),
+        help="generator engine to audit",
+    )
+    parser.add_argument("--max-failures", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    try:
+        password_targets = load_targets(args.data)
+    except FileNotFoundError:
+        parser.error(f"catalogue {args.data} does not exist")
+    except (KeyError, ValueError) as error:
+        parser.error(f"catalogue {args.data} does not load: {error!r}")
+    report = audit_targets(
+        password_targets,
+        args.keys or DEFAULT_KEYS,
+        args.workers,
+        args.chunk_size,
+        args.engine,
+    )
+    print(report.summary(args.max_failures))
+    if not report.targets:
+        print(f"catalogue {args.data} has no targets", file=sys.stderr)
+        return 1
+    return 1 if report.failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
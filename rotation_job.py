@@ -0,0 +1,364 @@
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import signal
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, List, Optional
+from password_target import PasswordTarget
+from password_generator import PasswordGeneratorProtocol
+from data_handler import DataHandler
+from generator_engines import EngineSelector, get_engine
+
+CHECKPOINT_VERSION = 2
+KEY_VERIFIER_ITERATIONS = 200_000
+
+
+@dataclass
+class Checkpoint:
+    """
+    Progress of a rotation job, written after every chunk.
+
+    Attributes
+    ----------
+    version : int
+    manifest_file : str, targets to rotate, one JSON list
+        [name, min_uppers, min_lowers, min_digits, length] per line,
+        relative to the checkpoint file directory
+    total : int, number of targets in the manifest
+    key_salt : str, hex salt of key_verifier
+    key_verifier : str, hex PBKDF2-HMAC-SHA256 of the hash key, checked on resume
+    next_index : int, index of the first target not rotated yet
+    manifest_offset : int, byte offset of that target in the manifest
+    output_offset : int, byte size of the output holding every completed chunk
+    elapsed : float, seconds spent over all runs
+    completed : bool
+    """
+
+    version: int
+    manifest_file: str
+    total: int
+    key_salt: str
+    key_verifier: str
+    next_index: int = 0
+    manifest_offset: int = 0
+    output_offset: int = 0
+    elapsed: float = 0.0
+    completed: bool = False
+
+
+@dataclass
+class Progress:
+    """
+    Progress report of a rotation job.
+
+    Attributes
+    ----------
+    done : int
+    total : int
+    elapsed : float, seconds spent over all runs
+    rate : float, targets per second in the current run
+    eta : float | None, estimated seconds left
+    """
+
+    done: int
+    total: int
+    elapsed: float
+    rate: float
+    eta: Optional[float]
+
+    def __str__(self) -> str:
+        percent = 100 * self.done / self.total if self.total else 100.0
+        eta = "?" if self.eta is None else f"{self.eta:.0f}s"
+        return (
+            f"{self.done}/{self.total} targets ({percent:.1f}%), "
+            f"{self.rate:.0f} targets/s, elapsed {self.elapsed:.0f}s, eta {eta}"
+        )
+
+
+class RotationJob:
+    """
+    Rotates the passwords of every catalogue target with a new hash key,
+    chunk by chunk, and can resume after being killed.
+
+    The targets and their requirements are frozen in a manifest on the first
+    run, the only time the catalogue is loaded. Each run then reads the
+    manifest one chunk at a time, and passwords are appended to the output
+    file as JSON lines ({"name": ..., "password": ...}), so only one chunk
+    is kept in memory. After each chunk the output is flushed to disk and
+    the checkpoint is replaced atomically, so a restarted job truncates the
+    output to the last checkpoint and continues with the next chunk without
+    regenerating completed targets.
+
+    The hash key itself is never written to disk. The checkpoint holds a
+    salted PBKDF2 verifier of it, and resuming with another key raises
+    ValueError instead of mixing passwords of both keys in the output.
+    The output and the manifest are only readable by their owner.
+
+    Attributes
+    ----------
+    data_handler : DataHandler
+    password_generator : PasswordGeneratorProtocol
+    output_file : str
+    checkpoint_file : str
+    chunk_size : int
+    on_progress : Callable[[Progress], None] | None, called after every chunk
+
+    Methods
+    -------
+    run(hash_key): rotate the remaining targets, returns the final checkpoint
+    stop(): finish the current chunk and return from run()
+    progress(): current Progress
+    """
+
+    def __init__(
+        self,
+        data_handler: DataHandler,
+        output_file: str,
+        checkpoint_file: Optional[str] = None,
+        password_generator: Optional[PasswordGeneratorProtocol] = None,
+        chunk_size: int = 1000,
+        on_progress: Optional[Callable[[Progress], None]] = None,
+    ) -> None:
+        self.data_handler = data_handler
+        self.output_file = output_file
+        self.checkpoint_file = checkpoint_file or f"{output_file}.checkpoint"
+        self.password_generator = password_generator or EngineSelector().select(
+            chunk_size
+        )
+        self.chunk_size = chunk_size
+        self.on_progress = on_progress
+        self.checkpoint: Optional[Checkpoint] = None
+        self._stop = False
+        self._run_start = 0.0
+        self._run_first_index = 0
+
+    def stop(self) -> None:
+        """
+        Ask run() to return after the current chunk is checkpointed.
+        """
+        self._stop = True
+
+    def progress(self) -> Progress:
+        """
+        Current progress, with a rate and ETA based on the current run.
+        Before run(), the progress stored in the checkpoint file, if any.
+        """
+        checkpoint = self.checkpoint or self._load_checkpoint()
+        if checkpoint is None:
+            return Progress(0, 0, 0.0, 0.0, None)
+        run_elapsed = time.perf_counter() - self._run_start if self._run_start else 0.0
+        run_done = checkpoint.next_index - self._run_first_index
+        rate = run_done / run_elapsed if run_elapsed > 0 else 0.0
+        left = checkpoint.total - checkpoint.next_index
+        eta = left / rate if rate > 0 else (0.0 if not left else None)
+        return Progress(
+            checkpoint.next_index,
+            checkpoint.total,
+            checkpoint.elapsed + run_elapsed,
+            rate,
+            eta,
+        )
+
+    def run(self, hash_key: str) -> Checkpoint:
+        """
+        Rotates the targets left since the last checkpoint.
+
+        Args:
+            hash_key (str): new hash key
+
+        Returns:
+            Checkpoint: checkpoint after the last processed chunk
+
+        Raises:
+            ValueError: the checkpoint was written for another hash key
+        """
+        self._stop = False
+        checkpoint = self._load_checkpoint()
+        if checkpoint is None:
+            checkpoint = self._start(hash_key)
+        elif not hmac.compare_digest(
+            self._key_verifier(hash_key, checkpoint.key_salt), checkpoint.key_verifier
+        ):
+            raise ValueError(
+                f"{self.checkpoint_file} was written for another hash key, "
+                "resume with the same key or delete the checkpoint to start over"
+            )
+        self.checkpoint = checkpoint
+        if checkpoint.completed:
+            return checkpoint
+        self._run_start = time.perf_counter()
+        self._run_first_index = checkpoint.next_index
+        elapsed_before = checkpoint.elapsed
+
+        with open(self._manifest_path(checkpoint), "rb") as manifest, open(
+            self.output_file, "r+b"
+        ) as output:
+            # drop whatever was written after the last checkpoint
+            output.truncate(checkpoint.output_offset)
+            output.seek(checkpoint.output_offset)
+            manifest.seek(checkpoint.manifest_offset)
+            while not self._stop and checkpoint.next_index < checkpoint.total:
+                chunk = self._read_targets(manifest)
+                passwords = self.password_generator.generate_passwords(chunk, hash_key)
+                output.write(
+                    "".join(
+                        json.dumps({"name": target.name, "password": password}) + "\n"
+                        for target, password in zip(chunk, passwords)
+                    ).encode()
+                )
+                output.flush()
+                os.fsync(output.fileno())
+
+                checkpoint.next_index += len(chunk)
+                checkpoint.manifest_offset = manifest.tell()
+                checkpoint.output_offset = output.tell()
+                checkpoint.completed = checkpoint.next_index >= checkpoint.total
+                checkpoint.elapsed = (
+                    elapsed_before + time.perf_counter() - self._run_start
+                )
+                self._save_checkpoint(checkpoint)
+                if self.on_progress is not None:
+                    self.on_progress(self.progress())
+        return checkpoint
+
+    def _read_targets(self, manifest) -> List[PasswordTarget]:
+        targets = []
+        for _ in range(self.chunk_size):
+            line = manifest.readline()
+            if not line:
+                break
+            name, min_uppers, min_lowers, min_digits, length = json.loads(line)
+            password_target = PasswordTarget(name)
+            password_target.min_uppers = min_uppers
+            password_target.min_lowers = min_lowers
+            password_target.min_digits = min_digits
+            password_target.length = length
+            targets.append(password_target)
+        return targets
+
+    @staticmethod
+    def _key_verifier(hash_key: str, salt: str) -> str:
+        return hashlib.pbkdf2_hmac(
+            "sha256", hash_key.encode(), bytes.fromhex(salt), KEY_VERIFIER_ITERATIONS
+        ).hex()
+
+    def _manifest_path(self, checkpoint: Checkpoint) -> str:
+        return os.path.join(
+            os.path.dirname(self.checkpoint_file), checkpoint.manifest_file
+        )
+
+    @staticmethod
+    def _create_private(path: str) -> int:
+        """
+        Creates or truncates a file readable and writable by its owner only.
+
+        Returns:
+            int: file descriptor open for writing
+        """
+        fd = os.open(path, os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 0o600)
+        if hasattr(os, "fchmod"):
+            # an existing file keeps its mode otherwise
+            os.fchmod(fd, 0o600)
+        return fd
+
+    def _start(self, hash_key: str) -> Checkpoint:
+        """
+        Freezes the targets in a manifest and writes the first checkpoint.
+        """
+        manifest_file = f"{os.path.basename(self.checkpoint_file)}.manifest"
+        total = 0
+        with open(
+            self._create_private(f"{self.checkpoint_file}.manifest"), "w"
+        ) as manifest:
+            for password_target in self.data_handler.read_all_targets_from_file():
+                record = [
+                    password_target.name,
+                    password_target.min_uppers,
+                    password_target.min_lowers,
+                    password_target.min_digits,
+                    password_target.length,
+                ]
+                manifest.write(json.dumps(record) + "\n")
+                total += 1
+            manifest.flush()
+            os.fsync(manifest.fileno())
+        os.close(self._create_private(self.output_file))
+        salt = os.urandom(16).hex()
+        checkpoint = Checkpoint(
+            CHECKPOINT_VERSION,
+            manifest_file,
+            total,
+            salt,
+            self._key_verifier(hash_key, salt),
+        )
+        checkpoint.completed = total == 0
+        self._save_checkpoint(checkpoint)
+        return checkpoint
+
+    def _load_checkpoint(self) -> Optional[Checkpoint]:
+        if not os.path.isfile(self.checkpoint_file):
+            return None
+        with open(self.checkpoint_file, "r") as checkpoint_file:
+            data = json.load(checkpoint_file)
+        if data.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(
+                f"unsupported checkpoint version {data.get('version')!r} "
+                f"in {self.checkpoint_file}"
+            )
+        return Checkpoint(**data)
+
+    def _save_checkpoint(self, checkpoint: Checkpoint) -> None:
+        temp_file = f"{self.checkpoint_file}.tmp"
+        with open(temp_file, "w") as checkpoint_file:
+            json.dump(asdict(checkpoint), checkpoint_file, indent=4)
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+        os.replace(temp_file, self.checkpoint_file)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Rotate every catalogue password with a new hash key, resumably."
+    )
+    parser.add_argument("output", help="JSON lines output file")
+    parser.add_argument("--data", default="data.json", help="target catalogue")
+    parser.add_argument(
+        "--checkpoint", default=None, help="default: <output>.checkpoint"
+    )
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--engine", default=None, help="default: calibrated choice")
+    parser.add_argument(
+        "--key-env",
+        default="ROTATION_HASH_KEY",
+        help="environment variable holding the new hash key",
+    )
+    args = parser.parse_args(argv)
+
+    hash_key = os.environ.get(args.key_env)
+    if not hash_key:
+        parser.error(f"set the new hash key in ${args.key_env}")
+    job = RotationJob(
+        DataHandler(args.data),
+        args.output,
+        args.checkpoint,
+        get_engine(args.engine) if args.engine else None,
+        args.chunk_size,
+        on_progress=lambda progress: print(progress, file=sys.stderr),
+    )
+    signal.signal(signal.SIGTERM, lambda signum, frame: job.stop())
+    signal.signal(signal.SIGINT, lambda signum, frame: job.stop())
+    try:
+        checkpoint = job.run(hash_key)
+    except ValueError as error:
+        parser.error(str(error))
+    status = "completed" if checkpoint.completed else "stopped, run again to resume"
+    print(f"{checkpoint.next_index}/{checkpoint.total} targets, {status}")
+    return 0 if checkpoint.completed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
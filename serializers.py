@@ -0,0 +1,320 @@
+import argparse
+import json
+import os
+import stat
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Protocol, Union, runtime_checkable
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+@runtime_checkable
+class Serializer(Protocol):
+    """
+    Protocol implemented by every catalogue serializer.
+
+    Attributes
+    ----------
+    name : str
+    extensions : tuple of file extensions handled by the serializer
+
+    Methods
+    -------
+    dumps(data): encode data to bytes
+    loads(raw): decode bytes to data
+    available(): whether the serializer dependencies are installed,
+        True unless an implementation overrides it
+    """
+
+    name: str
+    extensions: tuple
+
+    def dumps(self, data: Any) -> bytes: ...
+
+    def loads(self, raw: bytes) -> Any: ...
+
+    @classmethod
+    def available(cls) -> bool:
+        return True
+
+
+class JsonSerializer(Serializer):
+    """
+    Compact stdlib JSON, without indentation or spaces after separators.
+    """
+
+    name = "json"
+    extensions = (".json",)
+
+    def dumps(self, data: Any) -> bytes:
+        return json.dumps(data, separators=(",", ":")).encode()
+
+    def loads(self, raw: bytes) -> Any:
+        return json.loads(raw)
+
+
+class PrettyJsonSerializer(JsonSerializer):
+    """
+    Indented stdlib JSON, the historic data.json layout.
+    """
+
+    name = "json-pretty"
+    extensions = ()
+
+    def dumps(self, data: Any) -> bytes:
+        return json.dumps(data, indent=4).encode()
+
+
+class OrjsonSerializer(Serializer):
+    """
+    JSON through orjson. The output is compact JSON like JsonSerializer's,
+    but non-ASCII characters are written as raw UTF-8 instead of \\u escapes.
+    """
+
+    name = "orjson"
+    extensions = (".json",)
+
+    def dumps(self, data: Any) -> bytes:
+        return orjson.dumps(data)
+
+    def loads(self, raw: bytes) -> Any:
+        return orjson.loads(raw)
+
+    @classmethod
+    def available(cls) -> bool:
+        return orjson is not None
+
+
+class MsgpackSerializer(Serializer):
+    """
+    Binary MessagePack encoding.
+    """
+
+    name = "msgpack"
+    extensions = (".msgpack", ".mpk")
+
+    def dumps(self, data: Any) -> bytes:
+        return msgpack.packb(data, use_bin_type=True)
+
+    def loads(self, raw: bytes) -> Any:
+        return msgpack.unpackb(raw, raw=False)
+
+    @classmethod
+    def available(cls) -> bool:
+        return msgpack is not None
+
+
+SERIALIZERS = {
+    serializer.name: serializer
+    for serializer in (
+        JsonSerializer,
+        PrettyJsonSerializer,
+        OrjsonSerializer,
+        MsgpackSerializer,
+    )
+}
+
+
+def get_serializer(name: str) -> Serializer:
+    """
+    Get a serializer by name.
+
+    Args:
+        name (str): one of SERIALIZERS
+
+    Returns:
+        Serializer: serializer instance
+    """
+    if name not in SERIALIZERS:
+        raise ValueError(
+            f"unknown serializer {name!r}, expected one of {list(SERIALIZERS)}"
+        )
+    serializer = SERIALIZERS[name]
+    if not serializer.available():
+        raise ImportError(f"serializer {name!r} needs the {name} package")
+    return serializer()
+
+
+def serializer_for_path(path: str) -> Serializer:
+    """
+    Pick the serializer for a file from its extension. JSON files use orjson
+    when it is installed and compact stdlib JSON otherwise.
+
+    Args:
+        path (str): data file path
+
+    Returns:
+        Serializer: serializer instance
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in MsgpackSerializer.extensions:
+        return get_serializer(MsgpackSerializer.name)
+    if OrjsonSerializer.available():
+        return OrjsonSerializer()
+    return JsonSerializer()
+
+
+def resolve_serializer(
+    serializer: Union[None, str, Serializer], path: str
+) -> Serializer:
+    """
+    Resolve a serializer given by instance, by name or, when None, by file extension.
+    """
+    if serializer is None:
+        return serializer_for_path(path)
+    if isinstance(serializer, str):
+        return get_serializer(serializer)
+    return serializer
+
+
+def _is_msgpack_container(first: int) -> bool:
+    # fixmap, fixarray, array 16/32, map 16/32
+    return 0x80 <= first <= 0x9F or 0xDC <= first <= 0xDF
+
+
+def sniff_serializer(raw: bytes) -> Serializer:
+    """
+    Guess the serializer of encoded data from its first byte, so files keep
+    loading whatever serializer wrote them.
+
+    Args:
+        raw (bytes): encoded data
+
+    Returns:
+        Serializer: serializer able to decode raw
+
+    Raises:
+        ValueError: raw is neither a JSON nor a MessagePack object or array
+    """
+    head = raw.lstrip()[:1]
+    if head in (b"{", b"["):
+        return OrjsonSerializer() if OrjsonSerializer.available() else JsonSerializer()
+    if raw and _is_msgpack_container(raw[0]):
+        return get_serializer(MsgpackSerializer.name)
+    raise ValueError(
+        f"unrecognised catalogue format, starts with {raw[:8]!r}, "
+        "expected a JSON or MessagePack object"
+    )
+
+
+def load_file(path: str) -> Any:
+    """
+    Load a file written by any serializer.
+
+    Raises:
+        ValueError: the file is empty
+    """
+    with open(path, "rb") as data_file:
+        raw = data_file.read()
+    if not raw.strip():
+        raise ValueError(f"{path} is empty")
+    return sniff_serializer(raw).loads(raw)
+
+
+def _new_file_mode() -> int:
+    # os.umask is the only way to read the umask, set it straight back
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def write_atomic(path: str, raw: bytes) -> None:
+    """
+    Replace a file's content atomically.
+
+    raw is written to a temporary file in the same directory and moved over
+    path, so readers see either the old or the new content, never a partial
+    one. A symlinked path is followed and its target replaced. The file keeps
+    its permissions, a new file gets the usual umask-based ones.
+    """
+    path = os.path.realpath(path)
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = _new_file_mode()
+    fd, temp_file = tempfile.mkstemp(
+        dir=os.path.dirname(path), prefix=f".{os.path.basename(path)}."
+    )
+    try:
+        with os.fdopen(fd, "wb") as data_file:
+            data_file.write(raw)
+            data_file.flush()
+            os.fsync(data_file.fileno())
+        os.chmod(temp_file, mode)
+        os.replace(temp_file, path)
+    except BaseException:
+        os.unlink(temp_file)
+        raise
+
+
+def dump_file(data: Any, path: str, serializer: Serializer) -> None:
+    """
+    Write data to a file with the given serializer, see write_atomic.
+    """
+    write_atomic(path, serializer.dumps(data))
+
+
+def _sample_catalogue(targets: int) -> Dict[str, dict]:
+    return {
+        f"target-{idx}.example.com": {
+            "min_uppers": idx % 4,
+            "min_lowers": idx % 5,
+            "min_digits": idx % 3,
+            "length": 8 + idx % 20,
+        }
+        for idx in range(targets)
+    }
+
+
+def benchmark(
+    targets: int = 100_000, repeat: int = 5, names: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Measure encode/decode time and encoded size of a sample catalogue.
+
+    Args:
+        targets (int): number of targets in the sample catalogue
+        repeat (int): runs per measurement, the best one is kept
+        names (List[str]): serializers to measure, default all available ones
+
+    Returns:
+        List[Dict[str, Any]]: one row per serializer with name, encode, decode (seconds) and size (bytes)
+    """
+    data = _sample_catalogue(targets)
+    rows = []
+    for name in names or [name for name, cls in SERIALIZERS.items() if cls.available()]:
+        serializer = get_serializer(name)
+        encode = decode = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            raw = serializer.dumps(data)
+            encode = min(encode, time.perf_counter() - start)
+            start = time.perf_counter()
+            serializer.loads(raw)
+            decode = min(decode, time.perf_counter() - start)
+        rows.append(
+            {"name": name, "encode": encode, "decode": decode, "size": len(raw)}
+        )
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark catalogue serializers.")
+    parser.add_argument("--targets", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(f"{'serializer':<12} {'encode ms':>10} {'decode ms':>10} {'size KiB':>10}")
+    for row in benchmark(args.targets, args.repeat):
+        print(
+            f"{row['name']:<12} {row['encode'] * 1000:>10.1f} "
+            f"{row['decode'] * 1000:>10.1f} {row['size'] / 1024:>10.1f}"
+        )
@@ -0,0 +1,56 @@
+import asyncio
+import json
+import threading
+import time
+import pytest
+from async_api import AsyncDataHandler
+from data_handler import DataHandler
+from password_target import PasswordTarget
+
+
+@pytest.fixture
+def data_handler(tmp_path):
+    json_file = tmp_path / "data.json"
+    json_file.write_text(json.dumps({}))
+    return DataHandler(str(json_file), node_id="a")
+
+
+def test_cancelled_write_keeps_the_lock_until_done(data_handler, monkeypatch):
+    started = threading.Event()
+    add_password_target = data_handler.add_password_target
+
+    def slow_add(password_target):
+        started.set()
+        time.sleep(0.3)
+        add_password_target(password_target)
+
+    monkeypatch.setattr(data_handler, "add_password_target", slow_add)
+    async_handler = AsyncDataHandler(data_handler)
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(
+                async_handler.add_password_target(PasswordTarget("new")), 0.05
+            )
+        assert started.is_set()
+        # the write is still running in the executor, the read must wait for it
+        return await async_handler.contains("new")
+
+    assert asyncio.run(scenario())
+
+
+def test_concurrent_writes_are_all_kept(data_handler):
+    async_handler = AsyncDataHandler(data_handler)
+
+    async def scenario():
+        await asyncio.gather(
+            *(
+                async_handler.add_password_target(PasswordTarget(f"target-{idx}"))
+                for idx in range(20)
+            )
+        )
+        return await async_handler.read_targets_data_from_file(
+            [f"target-{idx}" for idx in range(20)]
+        )
+
+    assert len(asyncio.run(scenario())) == 20
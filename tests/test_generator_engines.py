@@ -0,0 +1,133 @@
+import random
+import pytest
+import generator_engines
+from generator_engines import (
+    ENGINE_ENV_VAR,
+    EngineSelector,
+    FastPasswordGenerator,
+    ProcessPoolPasswordGenerator,
+)
+from password_generator import OUTPUT_VERSION, PasswordGenerator
+from password_target import PasswordTarget
+
+
+def random_targets(count, max_length=128, seed=0):
+    rng = random.Random(seed)
+    targets = []
+    for idx in range(count):
+        password_target = PasswordTarget(f"target-{idx}-{rng.random()}")
+        password_target.min_uppers = rng.randrange(12)
+        password_target.min_lowers = rng.randrange(12)
+        password_target.min_digits = rng.randrange(12)
+        password_target.length = rng.randrange(max_length + 1)
+        targets.append(password_target)
+    return targets
+
+
+def test_fast_engine_matches_reference():
+    reference = PasswordGenerator()
+    fast = FastPasswordGenerator()
+    for password_target in random_targets(5000):
+        expected = reference.generate_password(password_target, "key")
+        assert fast.generate_password(password_target, "key") == expected
+
+
+def test_fast_engine_leaves_targets_untouched():
+    password_target = random_targets(1)[0]
+    before = (
+        password_target.min_uppers,
+        password_target.min_lowers,
+        password_target.min_digits,
+        password_target.length,
+    )
+    FastPasswordGenerator().generate_password(password_target, "key")
+    assert before == (
+        password_target.min_uppers,
+        password_target.min_lowers,
+        password_target.min_digits,
+        password_target.length,
+    )
+
+
+@pytest.mark.parametrize(
+    "engine", [PasswordGenerator(), FastPasswordGenerator()], ids=lambda e: e.name
+)
+def test_length_above_digest_raises_index_error(engine):
+    password_target = PasswordTarget("google")
+    password_target.length = 129
+    with pytest.raises(IndexError):
+        engine.generate_password(password_target, "key")
+
+
+def test_process_pool_engine_matches_reference():
+    targets = random_targets(300)
+    engine = ProcessPoolPasswordGenerator(workers=2, chunk_size=100)
+    try:
+        assert engine.generate_passwords(
+            targets, "key"
+        ) == PasswordGenerator().generate_passwords(targets, "key")
+    finally:
+        engine.close()
+
+
+class WrongEngine(FastPasswordGenerator):
+    name = "wrong"
+
+    def generate_passwords(self, password_targets, hash_key):
+        return ["x" * target.length for target in password_targets]
+
+
+class ClosingEngine(PasswordGenerator):
+    """
+    Reference engine recording its close() calls.
+    """
+
+    name = "closing"
+    closed = 0
+
+    def close(self):
+        ClosingEngine.closed += 1
+
+
+@pytest.fixture
+def engines(monkeypatch):
+    registry = {}
+    monkeypatch.setattr(generator_engines, "ENGINES", registry)
+    monkeypatch.delenv(ENGINE_ENV_VAR, raising=False)
+    ClosingEngine.closed = 0
+    return registry
+
+
+def test_override_is_honoured(engines, monkeypatch):
+    engines.update(fast=FastPasswordGenerator, python=PasswordGenerator)
+    assert EngineSelector(override="python").select(1000).name == "python"
+    monkeypatch.setenv(ENGINE_ENV_VAR, "python")
+    selector = EngineSelector()
+    assert selector.select(1000).name == "python"
+    assert selector.timings == {}
+    with pytest.raises(ValueError):
+        EngineSelector(override="missing").select(1)
+
+
+def test_engine_with_different_output_is_dropped(engines):
+    engines.update(wrong=WrongEngine, python=PasswordGenerator)
+    selector = EngineSelector(repeat=1)
+    assert selector.select(10).name == "python"
+    assert "wrong" not in selector.timings[10]
+
+
+def test_unselected_engines_are_closed(engines):
+    engines.update(fast=FastPasswordGenerator, closing=ClosingEngine)
+    selector = EngineSelector(repeat=1)
+    # the reference algorithm is slower than the fast engine
+    assert selector.calibrate([100]) == {100: "fast"}
+    assert ClosingEngine.closed == 1
+
+
+def test_incompatible_version_is_skipped(engines):
+    class FutureEngine(FastPasswordGenerator):
+        name = "future"
+        compatibility_version = OUTPUT_VERSION + 1
+
+    engines.update(future=FutureEngine, python=PasswordGenerator)
+    assert set(EngineSelector().engines) == {"python"}
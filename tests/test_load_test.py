@@ -0,0 +1,47 @@
+from load_test import (
+    REQUIREMENTS,
+    LoadTestConfig,
+    Write,
+    _target_name,
+    check_catalogue,
+    create_catalogue,
+)
+from data_handler import DataHandler
+from password_target import PasswordTarget
+
+
+def update(path, name, length):
+    password_target = DataHandler(path).read_target_data_from_file(name)
+    password_target.length = length
+    DataHandler(path).update_data_file(password_target)
+    record = tuple(getattr(password_target, key) for key in REQUIREMENTS)
+    return Write(name, record, 0.0, 0.0)
+
+
+def test_check_catalogue_accepts_last_write(tmp_path):
+    config = LoadTestConfig(targets=3)
+    path = create_catalogue(str(tmp_path), config)
+    name = _target_name(1)
+    first = update(path, name, 20)._replace(start=1.0, end=2.0)
+    last = update(path, name, 25)._replace(start=3.0, end=4.0)
+    assert check_catalogue(path, config, [first, last]) == []
+
+
+def test_check_catalogue_detects_lost_update(tmp_path):
+    config = LoadTestConfig(targets=3)
+    path = create_catalogue(str(tmp_path), config)
+    name = _target_name(1)
+    # the last recorded write is overwritten behind its back, as by a lost update
+    lost = update(path, name, 25)._replace(start=3.0, end=4.0)
+    update(path, name, 20)
+    problems = check_catalogue(path, config, [lost])
+    assert len(problems) == 1 and "lost update" in problems[0]
+
+
+def test_check_catalogue_accepts_overlapping_writes(tmp_path):
+    config = LoadTestConfig(targets=3)
+    path = create_catalogue(str(tmp_path), config)
+    name = _target_name(1)
+    stored = update(path, name, 20)._replace(start=1.0, end=3.0)
+    overlapping = stored._replace(record=stored.record[:3] + (25,), start=2.0, end=2.5)
+    assert check_catalogue(path, config, [stored, overlapping]) == []
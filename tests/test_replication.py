@@ -0,0 +1,194 @@
+import json
+import threading
+import time
+import pytest
+import data_handler
+from data_handler import DataHandler
+from password_target import PasswordTarget
+
+CATALOGUE = {
+    "google": {"min_uppers": 2, "min_lowers": 2, "min_digits": 0, "length": 8},
+    "github": {"min_uppers": 0, "min_lowers": 1, "min_digits": 1, "length": 8},
+    "poalim": {"min_uppers": 2, "min_lowers": 4, "min_digits": 3, "length": 10},
+}
+
+
+def make_target(name, length):
+    password_target = PasswordTarget(name)
+    password_target.length = length
+    return password_target
+
+
+def read_data(node):
+    with open(node.json_file) as json_file:
+        return json.load(json_file)
+
+
+def sync(source, target, cursors):
+    """
+    Sends source's changes since the last sync to target.
+    """
+    key = (source.node_id, target.node_id)
+    changes = source.changes_since(cursors.get(key, 0))
+    cursors[key] = source.last_seq()
+    return target.apply_changes(changes)
+
+
+@pytest.fixture
+def nodes(tmp_path):
+    handlers = []
+    for node_id in ("a", "b"):
+        directory = tmp_path / node_id
+        directory.mkdir()
+        (directory / "data.json").write_text(json.dumps(CATALOGUE, indent=4))
+        handlers.append(DataHandler(str(directory / "data.json"), node_id=node_id))
+    return handlers
+
+
+def test_identical_catalogues_need_no_changes(nodes):
+    a, b = nodes
+    cursors = {}
+    assert sync(a, b, cursors) == 0
+    assert sync(b, a, cursors) == 0
+    assert read_data(a) == read_data(b) == CATALOGUE
+
+
+def test_add_update_and_delete_replicate(nodes):
+    a, b = nodes
+    cursors = {}
+    sync(a, b, cursors)
+    sync(b, a, cursors)
+
+    a.add_password_target(make_target("new", 12))
+    google = a.read_target_data_from_file("google")
+    google.length = 16
+    a.update_data_file(google)
+    a.delete_password_target(PasswordTarget("github"))
+
+    assert sync(a, b, cursors) == 3
+    assert read_data(b) == read_data(a)
+    assert read_data(b)["google"]["length"] == 16
+    assert "github" not in read_data(b)
+    # the changes came back unchanged, nothing to apply
+    assert sync(b, a, cursors) == 0
+
+
+def test_tombstone_beats_older_update(nodes):
+    a, b = nodes
+    cursors = {}
+    github = b.read_target_data_from_file("github")
+    github.length = 20
+    b.update_data_file(github)
+    sync(b, a, cursors)
+    a.delete_password_target(PasswordTarget("github"))
+
+    sync(a, b, cursors)
+    assert "github" not in read_data(b)
+    # replaying b's older update does not resurrect the target
+    assert a.apply_changes(b.changes_since(0)) == 0
+    assert "github" not in read_data(a)
+
+
+def test_concurrent_edits_converge(nodes):
+    a, b = nodes
+    cursors = {}
+    google_a = a.read_target_data_from_file("google")
+    google_a.length = 11
+    a.update_data_file(google_a)
+    google_b = b.read_target_data_from_file("google")
+    google_b.length = 13
+    b.update_data_file(google_b)
+    b.add_password_target(make_target("only-b", 9))
+
+    sync(a, b, cursors)
+    sync(b, a, cursors)
+    sync(a, b, cursors)
+    assert read_data(a) == read_data(b)
+    # same clock, the higher node id wins
+    assert read_data(a)["google"]["length"] == 13
+    assert "only-b" in read_data(a)
+
+
+def test_later_edit_wins_after_sync(nodes):
+    a, b = nodes
+    cursors = {}
+    for _ in range(3):
+        google = b.read_target_data_from_file("google")
+        google.length += 1
+        b.update_data_file(google)
+    sync(b, a, cursors)
+    google = a.read_target_data_from_file("google")
+    google.length = 30
+    a.update_data_file(google)
+
+    sync(a, b, cursors)
+    assert read_data(b)["google"]["length"] == 30
+
+
+def test_deleting_missing_target_records_nothing(nodes):
+    a, _ = nodes
+    seq = a.last_seq()
+    a.delete_password_target(PasswordTarget("unknown"))
+    assert a.last_seq() == seq
+
+
+def test_compact_drops_old_tombstones(nodes):
+    a, _ = nodes
+    a.delete_password_target(PasswordTarget("github"))
+    for length in range(10, 20):
+        a.update_data_file(make_target("google", length))
+    seq = a.last_seq()
+    changes = a.changes_since(0)
+
+    a.compact()
+    assert a.changes_since(0) == changes
+    assert a.last_seq() == seq
+    with open(a.journal_file) as journal_file:
+        assert len(journal_file.readlines()) == len(CATALOGUE) + 2
+
+    a.compact(tombstone_horizon=seq)
+    assert "github" not in {change["name"] for change in a.changes_since(0)}
+    a.add_password_target(make_target("after", 8))
+    assert a.last_seq() == seq + 1
+
+
+def test_local_edit_during_apply_changes_is_kept(nodes, monkeypatch):
+    a, b = nodes
+    github = b.read_target_data_from_file("github")
+    github.length = 20
+    b.update_data_file(github)
+    changes = b.changes_since(0)
+
+    loaded = threading.Event()
+    load = a._load
+
+    def slow_load():
+        data = load()
+        loaded.set()
+        time.sleep(0.2)
+        return data
+
+    # a second handler on the same files, as another thread or process would use
+    local = DataHandler(a.json_file)
+    monkeypatch.setattr(a, "_load", slow_load)
+    applier = threading.Thread(target=a.apply_changes, args=(changes,))
+    applier.start()
+    assert loaded.wait(5)
+    local.update_data_file(make_target("google", 15))
+    applier.join()
+
+    assert read_data(a)["google"]["length"] == 15
+    assert read_data(a)["github"]["length"] == 20
+    exported = {change["name"]: change["record"] for change in local.changes_since(0)}
+    assert exported["google"]["length"] == 15
+
+
+def test_local_edits_compact_the_journal(nodes, monkeypatch):
+    a, _ = nodes
+    monkeypatch.setattr(data_handler, "COMPACT_SLACK", 5)
+    for length in range(8, 40):
+        a.update_data_file(make_target("google", length))
+    with open(a.journal_file) as journal_file:
+        assert len(journal_file.readlines()) <= 2 * len(CATALOGUE) + 5
+    assert read_data(a)["google"]["length"] == 39
+    assert a.last_seq() == len(CATALOGUE) + 32
@@ -0,0 +1,112 @@
+import json
+import os
+import pytest
+from data_handler import DataHandler
+from generator_engines import FastPasswordGenerator
+from rotation_job import RotationJob
+
+TARGETS = 250
+
+
+@pytest.fixture
+def data_handler(tmp_path):
+    json_file = tmp_path / "data.json"
+    json_file.write_text(
+        json.dumps(
+            {
+                f"target-{idx}.example.com": {
+                    "min_uppers": idx % 4,
+                    "min_lowers": idx % 5,
+                    "min_digits": idx % 3,
+                    "length": 8 + idx % 20,
+                }
+                for idx in range(TARGETS)
+            }
+        )
+    )
+    return DataHandler(str(json_file), node_id="a")
+
+
+def make_job(data_handler, output_file, chunk_size):
+    return RotationJob(
+        data_handler,
+        str(output_file),
+        password_generator=FastPasswordGenerator(),
+        chunk_size=chunk_size,
+    )
+
+
+def run_chunks(job, chunks, hash_key="key"):
+    """
+    Runs a job and stops it after the given number of chunks.
+    """
+    done = []
+
+    def on_progress(progress):
+        done.append(progress)
+        if len(done) == chunks:
+            job.stop()
+
+    job.on_progress = on_progress
+    return job.run(hash_key)
+
+
+def test_resume_matches_uninterrupted_run(data_handler, tmp_path):
+    reference = tmp_path / "reference.jsonl"
+    assert make_job(data_handler, reference, 100).run("key").completed
+
+    output = tmp_path / "resumed.jsonl"
+    checkpoint = run_chunks(make_job(data_handler, output, 30), 3)
+    assert not checkpoint.completed
+    assert checkpoint.next_index == 90
+    # a chunk torn by a crash after the last checkpoint
+    with open(output, "ab") as output_file:
+        output_file.write(b'{"name": "target-90.example.com", "pass')
+
+    generated = []
+    engine = FastPasswordGenerator()
+
+    class CountingGenerator:
+        def generate_passwords(self, password_targets, hash_key):
+            generated.extend(target.name for target in password_targets)
+            return engine.generate_passwords(password_targets, hash_key)
+
+    resumed = make_job(data_handler, output, 70)
+    resumed.password_generator = CountingGenerator()
+    checkpoint = resumed.run("key")
+    assert checkpoint.completed
+    assert len(generated) == TARGETS - 90
+    assert output.read_bytes() == reference.read_bytes()
+
+
+def test_resume_with_another_key_fails(data_handler, tmp_path):
+    output = tmp_path / "rotated.jsonl"
+    run_chunks(make_job(data_handler, output, 50), 1)
+    with pytest.raises(ValueError):
+        make_job(data_handler, output, 50).run("other key")
+    assert make_job(data_handler, output, 50).run("key").completed
+
+
+def test_progress_before_run(data_handler, tmp_path):
+    output = tmp_path / "rotated.jsonl"
+    assert make_job(data_handler, output, 50).progress().total == 0
+    run_chunks(make_job(data_handler, output, 50), 2)
+    progress = make_job(data_handler, output, 50).progress()
+    assert (progress.done, progress.total) == (100, TARGETS)
+
+
+def test_resume_from_another_directory(data_handler, tmp_path, monkeypatch):
+    jobs = tmp_path / "jobs"
+    jobs.mkdir()
+    monkeypatch.chdir(jobs)
+    run_chunks(make_job(data_handler, "rotated.jsonl", 50), 1)
+    monkeypatch.chdir(tmp_path)
+    assert make_job(data_handler, jobs / "rotated.jsonl", 50).run("key").completed
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX file modes")
+def test_output_and_manifest_are_private(data_handler, tmp_path):
+    output = tmp_path / "rotated.jsonl"
+    make_job(data_handler, output, 50).run("key")
+    for path in (output, tmp_path / "rotated.jsonl.checkpoint.manifest"):
+        assert os.stat(path).st_mode & 0o777 == 0o600
@@ -0,0 +1,103 @@
+import json
+import os
+import pytest
+from data_handler import DataHandler
+from password_target import PasswordTarget
+from serializers import (
+    SERIALIZERS,
+    dump_file,
+    get_serializer,
+    load_file,
+    sniff_serializer,
+)
+
+# the historic data.json layout: indented, ASCII-escaped, name inside each record
+LEGACY_CATALOGUE = {
+    "google": {
+        "name": "google",
+        "min_uppers": 2,
+        "min_lowers": 2,
+        "min_digits": 0,
+        "length": 8,
+    },
+    "תצךע": {
+        "name": "תצךע",
+        "min_uppers": 4,
+        "min_lowers": 3,
+        "min_digits": 4,
+        "length": 13,
+    },
+}
+
+SERIALIZER_NAMES = [
+    pytest.param(
+        name,
+        marks=pytest.mark.skipif(
+            not serializer.available(), reason=f"{name} is not installed"
+        ),
+    )
+    for name, serializer in SERIALIZERS.items()
+]
+
+
+@pytest.fixture
+def legacy_file(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps(LEGACY_CATALOGUE, indent=4))
+    return str(path)
+
+
+@pytest.mark.parametrize("name", SERIALIZER_NAMES)
+def test_round_trip(name):
+    serializer = get_serializer(name)
+    assert serializer.loads(serializer.dumps(LEGACY_CATALOGUE)) == LEGACY_CATALOGUE
+
+
+@pytest.mark.parametrize("name", SERIALIZER_NAMES)
+def test_legacy_catalogue_loads(legacy_file, name):
+    data_handler = DataHandler(legacy_file, serializer=name)
+    google = data_handler.read_target_data_from_file("google")
+    assert (google.min_uppers, google.length) == (2, 8)
+    assert data_handler.contains("תצךע")
+
+    # the first save rewrites the file with the chosen serializer
+    new_target = PasswordTarget("new")
+    new_target.length = 10
+    data_handler.add_password_target(new_target)
+    data = load_file(legacy_file)
+    assert data["google"] == LEGACY_CATALOGUE["google"]
+    assert data["new"]["length"] == 10
+    assert len(DataHandler(legacy_file).read_all_targets_from_file()) == 3
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_bytes(b'"google": {"length": 8}}')
+    with pytest.raises(ValueError, match="unrecognised catalogue format"):
+        load_file(str(path))
+    with pytest.raises(ValueError, match="unrecognised catalogue format"):
+        sniff_serializer(b"\x00")
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX file modes and symlinks")
+def test_dump_keeps_mode_and_symlink(tmp_path):
+    target = tmp_path / "catalogue.json"
+    target.write_text("{}")
+    os.chmod(target, 0o640)
+    link = tmp_path / "data.json"
+    link.symlink_to(target)
+
+    dump_file({"google": {}}, str(link), get_serializer("json"))
+    assert link.is_symlink()
+    assert load_file(str(target)) == {"google": {}}
+    assert os.stat(target).st_mode & 0o777 == 0o640
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX file modes")
+def test_new_file_follows_umask(tmp_path):
+    umask = os.umask(0o027)
+    try:
+        dump_file({}, str(tmp_path / "data.json"), get_serializer("json"))
+    finally:
+        os.umask(umask)
+    assert os.stat(tmp_path / "data.json").st_mode & 0o777 == 0o640
@@ -2,11 +2,18 @@ import customtkinter as ctk
 from password_target import PasswordTarget
 from data_handler import DataHandler
 
+MAX_LENGTH = 30
+COUNT_VALUES = [str(_) for _ in range(10)]
+LENGTH_VALUES = [str(_) for _ in range(MAX_LENGTH)]
+DEFAULT_FG_COLOR = ("blue", "black")
+
 
 class UpdateTargetRequirements:
     """
     This class defines the update target requirements window.
 
+    The window is built once and reused: bind_target() points it at another
+    PasswordTarget, show() and hide() toggle its visibility.
 
     Attributes
     ----------
@@ -20,6 +27,9 @@ class UpdateTargetRequirements:
 
     Methods
     -------
+    bind_target(password_target)
+    show()
+    hide()
     define_vars()
     set_up_buttons()
     set_up_optionmenus()
@@ -43,6 +53,41 @@ class UpdateTargetRequirements:
         self.data_handler = data_handler
         self.set_up_toplevel_window()
 
+    def bind_target(self, password_target: PasswordTarget) -> None:
+        """
+        Rebinds the window to another password target, resetting the optionmenus.
+
+        Args:
+            password_target (PasswordTarget): password target to edit.
+        """
+        self.password_target = password_target
+        self.min_uppers_optionmenu_var.set(str(password_target.min_uppers))
+        self.min_lowers_optionmenu_var.set(str(password_target.min_lowers))
+        self.min_digits_optionmenu_var.set(str(password_target.min_digits))
+        self.length_optionmenu_var.set(str(password_target.length))
+        for optionmenu in (
+            self.window.min_uppers_optionmenu,
+            self.window.min_lowers_optionmenu,
+            self.window.min_digits_optionmenu,
+            self.window.length_optionmenu,
+        ):
+            optionmenu.configure(fg_color=DEFAULT_FG_COLOR)
+        self.reconfigure_length_optionmenu()
+
+    def show(self) -> None:
+        """
+        Shows the window and gives it focus.
+        """
+        self.window.deiconify()
+        self.window.lift()
+        self.window.focus()
+
+    def hide(self) -> None:
+        """
+        Hides the window, keeping its widgets for the next target.
+        """
+        self.window.withdraw()
+
     def define_vars(self) -> None:
         """
         Defines the variables used in the update target requirements window.
@@ -77,30 +122,30 @@ class UpdateTargetRequirements:
 
         self.window.min_uppers_optionmenu = ctk.CTkOptionMenu(
             master=self.window.frame_1,
-            values=[str(_) for _ in range(10)],
+            values=COUNT_VALUES,
             command=self.min_uppers_optionmenu_callback,
             variable=self.min_uppers_optionmenu_var,
-            fg_color=("blue", "black"),
+            fg_color=DEFAULT_FG_COLOR,
         )
         self.window.min_lowers_optionmenu = ctk.CTkOptionMenu(
             master=self.window.frame_1,
-            values=[str(_) for _ in range(10)],
+            values=COUNT_VALUES,
             command=self.min_lowers_optionmenu_callback,
             variable=self.min_lowers_optionmenu_var,
-            fg_color=("blue", "black"),
+            fg_color=DEFAULT_FG_COLOR,
         )
         self.window.min_digits_optionmenu = ctk.CTkOptionMenu(
             master=self.window.frame_1,
-            values=[str(_) for _ in range(10)],
+            values=COUNT_VALUES,
             command=self.min_digits_optionmenu_callback,
             variable=self.min_digits_optionmenu_var,
-            fg_color=("blue", "black"),
+            fg_color=DEFAULT_FG_COLOR,
         )
         self.window.length_optionmenu = ctk.CTkOptionMenu(
             master=self.window.frame_1,
             command=self.length_optionmenu_callback,
             variable=self.length_optionmenu_var,
-            fg_color=("blue", "black"),
+            fg_color=DEFAULT_FG_COLOR,
         )
 
     def set_up_labels(self) -> None:
@@ -189,11 +234,11 @@ class UpdateTargetRequirements:
     def submit_btn_callback(self) -> None:
         """
         Callback function for the submit_btn.
-        update the data base with the new password requirements and destroy the window.
+        update the data base with the new password requirements and hide the window.
 
         """
         self.data_handler.update_data_file(self.password_target)
-        self.window.destroy()
+        self.hide()
 
     def compute_minimum_length(self) -> int:
         """
@@ -217,7 +262,7 @@ class UpdateTargetRequirements:
             self.length_optionmenu_var.set(min_len)
         self.password_target.length = int(self.window.length_optionmenu.get())
         self.window.length_optionmenu.configure(
-            values=[str(_) for _ in range(min_len, 30)],
+            values=LENGTH_VALUES[min_len:],
         )
 
     def pack_window(self) -> None:
@@ -242,6 +287,7 @@ class UpdateTargetRequirements:
         """
         self.window.geometry("400x650")
         self.window.title("Update requirements")
+        self.window.protocol("WM_DELETE_WINDOW", self.hide)
         self.window.frame_1 = ctk.CTkFrame(master=self.window)
 
         self.define_vars()